@@ -0,0 +1,296 @@
+"""
+Archivo de HTML crudo direccionado por contenido (hash → blob)
+"""
+
+import os
+import re
+import time
+import zlib
+import struct
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import Counter
+
+from config import ARCHIVE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Cabecera de cada blob en un segmento: magic, sha256, id de diccionario, longitud
+BLOB_HEADER = struct.Struct('>4s32s16sQ')
+BLOB_MAGIC = b'F25B'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    dict_id TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    hash TEXT NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS fetches_url ON fetches (url, fetched_at);
+CREATE INDEX IF NOT EXISTS fetches_source ON fetches (source);
+CREATE TABLE IF NOT EXISTS dictionaries (
+    dict_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def train_dictionary(samples, dict_size):
+    """Entrena un diccionario zlib con los fragmentos de plantilla comunes
+
+    Parte cada muestra en fragmentos terminados en '>' (etiquetas y texto
+    entre etiquetas) y se queda con los que aparecen en al menos la mitad
+    de las muestras. zlib aprovecha mejor lo que está al final del
+    diccionario, así que los fragmentos más frecuentes van al final.
+    """
+    document_frequency = Counter()
+    for sample in samples:
+        document_frequency.update(set(re.split(rb'(?<=>)', sample)))
+
+    threshold = max(2, len(samples) // 2)
+    common = [
+        (count, fragment) for fragment, count in document_frequency.items()
+        if count >= threshold and len(fragment) >= 8
+    ]
+    common.sort(key=lambda item: (item[0], len(item[1])))
+
+    chosen = []
+    total = 0
+    for _, fragment in reversed(common):
+        if total + len(fragment) > dict_size:
+            continue
+        chosen.append(fragment)
+        total += len(fragment)
+
+    return b''.join(reversed(chosen))
+
+
+class PageArchive:
+    """Archivo append-only de páginas descargadas
+
+    - Los cuerpos se identifican por su SHA-256: una página idéntica se
+      guarda una sola vez aunque se descargue muchas veces.
+    - Los blobs se comprimen con zlib usando un diccionario por fuente,
+      entrenado con las primeras ``dict_samples`` páginas de esa fuente,
+      de modo que miles de perfiles con la misma plantilla comprimen bien.
+    - Los blobs se añaden a segmentos de tamaño acotado; cada proceso
+      escribe en sus propios segmentos, nunca se reescriben.
+    - ``index.sqlite`` mapea hash → (segmento, offset) y URL + fecha → hash.
+    """
+
+    def __init__(self, root=None, segment_size=None, dict_samples=None,
+                 dict_size=None, compression_level=None):
+        self.root = root or ARCHIVE_CONFIG['dir']
+        self.segment_size = segment_size or ARCHIVE_CONFIG['segment_size']
+        self.dict_samples = dict_samples or ARCHIVE_CONFIG['dict_samples']
+        self.dict_size = dict_size or ARCHIVE_CONFIG['dict_size']
+        self.compression_level = compression_level or ARCHIVE_CONFIG['compression_level']
+
+        self.segments_dir = os.path.join(self.root, 'segments')
+        self.dicts_dir = os.path.join(self.root, 'dicts')
+        os.makedirs(self.segments_dir, exist_ok=True)
+        os.makedirs(self.dicts_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(self.root, 'index.sqlite'),
+                                  check_same_thread=False, timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+        self.segment_file = None
+        self.segment_name = None
+        self.segment_counter = 0
+        self.dictionaries = {}      # dict_id → bytes
+        self.source_dicts = {}      # source → dict_id
+        self.pending_samples = {}   # source → [bytes] hasta entrenar
+
+        for dict_id, source in self.db.execute(
+                'SELECT dict_id, source FROM dictionaries ORDER BY created_at'):
+            self.source_dicts[source] = dict_id
+
+    # === Diccionarios ===
+
+    def load_dictionary(self, dict_id):
+        """Carga (y memoriza) un diccionario por id"""
+        if dict_id not in self.dictionaries:
+            with open(os.path.join(self.dicts_dir, f"{dict_id}.zdict"), 'rb') as f:
+                self.dictionaries[dict_id] = f.read()
+        return self.dictionaries[dict_id]
+
+    def dictionary_for(self, source, content):
+        """Diccionario de una fuente; entrena uno cuando hay muestras suficientes"""
+        dict_id = self.source_dicts.get(source)
+        if dict_id is not None:
+            return dict_id
+
+        samples = self.pending_samples.setdefault(source, [])
+        samples.append(content)
+        if len(samples) < self.dict_samples:
+            return None
+
+        zdict = train_dictionary(samples, self.dict_size)
+        del self.pending_samples[source]
+        if not zdict:
+            return None
+
+        dict_id = hashlib.sha256(zdict).hexdigest()[:16]
+        path = os.path.join(self.dicts_dir, f"{dict_id}.zdict")
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(zdict)
+        self.db.execute('INSERT OR IGNORE INTO dictionaries VALUES (?, ?, ?)',
+                        (dict_id, source, time.time()))
+        self.dictionaries[dict_id] = zdict
+        self.source_dicts[source] = dict_id
+        logger.info(f"Trained archive dictionary for {source}: {len(zdict)} bytes ({dict_id})")
+        return dict_id
+
+    def compress(self, content, dict_id):
+        if dict_id is None:
+            return zlib.compress(content, self.compression_level)
+        compressor = zlib.compressobj(self.compression_level, zdict=self.load_dictionary(dict_id))
+        return compressor.compress(content) + compressor.flush()
+
+    def decompress(self, blob, dict_id):
+        if not dict_id:
+            return zlib.decompress(blob)
+        decompressor = zlib.decompressobj(zdict=self.load_dictionary(dict_id))
+        return decompressor.decompress(blob) + decompressor.flush()
+
+    # === Segmentos ===
+
+    def current_segment(self, incoming):
+        """Segmento abierto para escribir, rotando si se superaría ``segment_size``"""
+        if self.segment_file is not None and self.segment_file.tell() + incoming > self.segment_size:
+            self.segment_file.close()
+            self.segment_file = None
+
+        if self.segment_file is None:
+            self.segment_counter += 1
+            self.segment_name = (
+                f"segment-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{self.segment_counter:04d}.dat"
+            )
+            self.segment_file = open(os.path.join(self.segments_dir, self.segment_name), 'ab')
+        return self.segment_file
+
+    # === API ===
+
+    def put(self, url, content, source=None, fetched_at=None):
+        """Archiva el cuerpo de una página y registra la descarga; devuelve el hash"""
+        digest = hashlib.sha256(content).digest()
+        content_hash = digest.hex()
+        fetched_at = fetched_at or time.time()
+
+        with self.lock:
+            known = self.db.execute('SELECT 1 FROM blobs WHERE hash = ?', (content_hash,)).fetchone()
+            if not known:
+                dict_id = self.dictionary_for(source, content) if source else None
+                blob = self.compress(content, dict_id)
+                header = BLOB_HEADER.pack(BLOB_MAGIC, digest, (dict_id or '').encode('ascii'), len(blob))
+
+                segment = self.current_segment(len(header) + len(blob))
+                offset = segment.tell() + len(header)
+                segment.write(header)
+                segment.write(blob)
+                segment.flush()
+
+                self.db.execute(
+                    'INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (content_hash, self.segment_name, offset, len(blob), len(content), dict_id, source)
+                )
+
+            self.db.execute(
+                'INSERT INTO fetches (url, fetched_at, hash, source) VALUES (?, ?, ?, ?)',
+                (url, fetched_at, content_hash, source)
+            )
+            self.db.commit()
+
+        return content_hash
+
+    def get(self, content_hash):
+        """Devuelve el cuerpo original de un hash"""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT segment, offset, length, dict_id FROM blobs WHERE hash = ?', (content_hash,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(content_hash)
+        return self.read_blob(*row)
+
+    def read_blob(self, segment, offset, length, dict_id):
+        """Lee y descomprime un blob a partir de su ubicación"""
+        with open(os.path.join(self.segments_dir, segment), 'rb') as f:
+            f.seek(offset)
+            blob = f.read(length)
+        return self.decompress(blob, dict_id)
+
+    def latest(self, url):
+        """(fetched_at, hash) de la última descarga de una URL, o None"""
+        with self.lock:
+            return self.db.execute(
+                'SELECT fetched_at, hash FROM fetches WHERE url = ? ORDER BY fetched_at DESC LIMIT 1',
+                (url,)
+            ).fetchone()
+
+    def iter_latest(self, source=None):
+        """Última descarga de cada URL: (url, source, fetched_at, segment, offset, length, dict_id)
+
+        Usa una conexión propia para no bloquear ``put`` mientras se recorre
+        y ordena por segmento y offset para leer los segmentos secuencialmente.
+        """
+        query = (
+            'SELECT f.url, f.source, f.fetched_at, b.segment, b.offset, b.length, b.dict_id '
+            'FROM fetches f JOIN blobs b ON b.hash = f.hash '
+            'WHERE f.id IN (SELECT MAX(id) FROM fetches GROUP BY url)'
+        )
+        params = ()
+        if source:
+            query += ' AND f.source = ?'
+            params = (source,)
+        query += ' ORDER BY b.segment, b.offset'
+
+        db = sqlite3.connect(os.path.join(self.root, 'index.sqlite'), timeout=30)
+        try:
+            yield from db.execute(query, params)
+        finally:
+            db.close()
+
+    def stats(self):
+        """Tamaño del archivo: descargas, blobs únicos, bytes originales y comprimidos"""
+        with self.lock:
+            fetches = self.db.execute('SELECT COUNT(*) FROM fetches').fetchone()[0]
+            blobs, size, stored = self.db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM blobs'
+            ).fetchone()
+        return {
+            'fetches': fetches,
+            'unique_pages': blobs,
+            'original_bytes': size,
+            'stored_bytes': stored,
+            'compression_ratio': f"{size / stored:.1f}x" if stored else "n/a"
+        }
+
+    def close(self):
+        with self.lock:
+            if self.segment_file is not None:
+                self.segment_file.close()
+                self.segment_file = None
+            self.db.close()
+
+
+# Instancia global (None si el archivo está desactivado)
+page_archive = PageArchive() if ARCHIVE_CONFIG['enabled'] else None
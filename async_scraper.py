@@ -0,0 +1,370 @@
+"""
+Motor de scraping asíncrono (asyncio + aiohttp)
+"""
+
+import asyncio
+import time
+import random
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from collections import defaultdict
+
+try:
+    import aiohttp
+except ImportError:  # Dependencia opcional: solo la necesita `batch --async`
+    aiohttp = None
+
+from config import HEADERS, TIMEOUT_CONFIG, ASYNC_CONFIG
+from rate_limiter import host_scheduler, metrics
+from robots_checker import robots_checker
+from http_cache import http_cache
+from canonical_url import CanonicalURL
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncScraper:
+    """Scraper asíncrono: muchos hosts a la vez en un único event loop
+
+    Reutiliza los extractores del ``Scraper`` síncrono sin modificarlos: el
+    parseo se delega a un executor para no bloquear el loop. Cada host tiene
+    su semáforo (``per_host_concurrency``) y su token bucket en el
+    ``HostScheduler``, así que la cortesía por host es la misma que en modo
+    síncrono; lo que cambia es que los hosts avanzan en paralelo.
+    """
+
+    def __init__(self, scraper=None, scheduler=None, max_connections=None,
+                 per_host_concurrency=None, parse_workers=None):
+        if aiohttp is None:
+            raise ImportError("AsyncScraper requires aiohttp: pip install aiohttp")
+
+        if scraper is None:
+            from scraper import scraper
+        self.scraper = scraper
+        self.scheduler = scheduler or host_scheduler
+        self.max_connections = max_connections or ASYNC_CONFIG['max_connections']
+        self.per_host_concurrency = per_host_concurrency or ASYNC_CONFIG['per_host_concurrency']
+        self.parse_workers = parse_workers or ASYNC_CONFIG['parse_workers']
+
+        self.host_semaphores = {}
+        self.robots_locks = None
+
+    def semaphore_for(self, host):
+        """Semáforo de concurrencia de un host"""
+        semaphore = self.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self.host_semaphores[host] = semaphore
+        return semaphore
+
+    async def check_compliance(self, url, host):
+        """Decisión de compliance por URL; robots.txt se descarga una vez por host"""
+        loop = asyncio.get_running_loop()
+        async with self.robots_locks[host]:
+            return await loop.run_in_executor(
+                None, lambda: robots_checker.comprehensive_check(url, check_tos=False)
+            )
+
+    def parse_with_tos(self, content, url, compliance):
+        """Verificación de ToS, archivo y extracción (se ejecuta en el executor)"""
+        robots_checker.add_tos_check(compliance, content)
+        for warning in compliance['warnings']:
+            logger.warning(f"Compliance warning for {url}: {warning}")
+        self.scraper.archive_page(url, content)
+        return self.scraper.parse_content(content, url)
+
+    async def scrape_url(self, session, url, executor, max_retries=3):
+        """Scrapea una URL respetando el semáforo y el bucket de su host"""
+        url = CanonicalURL(url)
+        host = self.scheduler.host_for(url)
+        loop = asyncio.get_running_loop()
+
+        async with self.semaphore_for(host):
+            logger.info(f"Starting scrape: {url}")
+
+            compliance = await self.check_compliance(url, host)
+            if not compliance['overall_allowed']:
+                raise ValueError(f"Scraping not allowed for {url}")
+
+            use_cache = http_cache is not None
+
+            for attempt in range(max_retries):
+                # Rate limiting por host sin bloquear el loop
+                delay = self.scheduler.reserve(host, compliance['robots_txt'].get('crawl_delay'))
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                try:
+                    logger.debug(f"Request attempt {attempt + 1}/{max_retries}")
+
+                    # Revalidar contra la caché HTTP en disco si hay validadores
+                    # (la caché lee y escribe en disco: fuera del loop)
+                    entry = None
+                    if use_cache:
+                        entry = await loop.run_in_executor(None, http_cache.lookup, url)
+                    headers = http_cache.conditional_headers(url, entry) if entry else None
+
+                    async with session.get(url.original, headers=headers) as response:
+                        content = await response.read()
+                        status = response.status
+                        retry_after = response.headers.get('Retry-After')
+                        response_headers = response.headers
+
+                    if status == 304 and entry:
+                        cached = await loop.run_in_executor(None, http_cache.load_body, url, entry)
+                        if cached is not None:
+                            metrics.update_cache(hit=True, bytes_saved=len(cached))
+                            content, status = cached, 200
+                        else:
+                            use_cache = False  # Metadatos sin cuerpo: repetir sin validadores
+
+                    elif status == 200 and use_cache:
+                        metrics.update_cache(hit=False)
+                        await loop.run_in_executor(None, http_cache.store, url, response_headers, content)
+
+                    if status == 200:
+                        metrics.update_request(success=True)
+                        return await loop.run_in_executor(
+                            executor, self.parse_with_tos, content, url, compliance
+                        )
+
+                    elif status == 429:
+                        # Rate limited
+                        metrics.update_request(success=False, rate_limited=True)
+                        wait = int(retry_after) if retry_after and retry_after.isdigit() else 60
+                        logger.warning(f"Rate limited. Waiting {wait}s")
+                        await asyncio.sleep(wait)
+
+                    else:
+                        metrics.update_request(success=False)
+                        logger.warning(f"HTTP {status}: {url}")
+
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    metrics.update_request(success=False, error_type=type(e).__name__)
+                    logger.error(f"Request failed (attempt {attempt + 1}): {e}")
+
+                    if attempt < max_retries - 1:
+                        # Backoff exponencial con jitter, sin bloquear el loop
+                        backoff = min(2 ** attempt, 60)
+                        await asyncio.sleep(backoff + backoff * 0.1 * random.random())
+                        continue
+
+                    raise Exception(f"Failed after {max_retries} attempts: {e}")
+
+            raise Exception(f"Max retries reached for {url}")
+
+    async def run(self, urls):
+        """Scrapea todas las URLs concurrentemente; resultados en orden de entrada"""
+        # Semáforos y locks pertenecen al loop de esta ejecución
+        self.host_semaphores = {}
+        self.robots_locks = defaultdict(asyncio.Lock)
+
+        timeout = aiohttp.ClientTimeout(
+            total=TIMEOUT_CONFIG['total_timeout'],
+            sock_connect=TIMEOUT_CONFIG['request_timeout'],
+            sock_read=TIMEOUT_CONFIG['read_timeout']
+        )
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host_concurrency
+        )
+
+        with ThreadPoolExecutor(max_workers=self.parse_workers,
+                                thread_name_prefix='parse') as executor:
+            async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout,
+                                             connector=connector) as session:
+                tasks = [self.scrape_url(session, url, executor) for url in urls]
+                outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = []
+        errors = []
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Failed to scrape {url}: {outcome}")
+                errors.append({
+                    'url': url,
+                    'error': str(outcome),
+                    'timestamp': datetime.now().isoformat()
+                })
+            else:
+                results.append(outcome)
+
+        return results, errors
+
+    async def run_stream(self, urls, on_result, on_error, on_url_done=None, max_in_flight=None):
+        """Scrapea un iterable perezoso de URLs entregando cada resultado según termina
+
+        Mismo contrato que ``BatchPipeline.run``: ``on_result``/``on_error``
+        por cada URL y ``on_url_done(url, ok)`` después. Como mucho hay
+        ``max_in_flight`` URLs en vuelo, así que la memoria no depende del
+        tamaño de la entrada. Las URLs se leen y los callbacks se llaman en
+        un único hilo aparte (en orden, sin bloquear el loop con la
+        escritura a disco). Devuelve los contadores de resultados y errores.
+        """
+        self.host_semaphores = {}
+        self.robots_locks = defaultdict(asyncio.Lock)
+        loop = asyncio.get_running_loop()
+        max_in_flight = max_in_flight or ASYNC_CONFIG['max_in_flight']
+        urls = iter(urls)
+        counts = {'results': 0, 'errors': 0}
+
+        def take(n):
+            return [CanonicalURL(url) for url in itertools.islice(urls, n)]
+
+        def deliver(url, error, record):
+            if error is not None:
+                logger.error(f"Failed to scrape {url}: {error}")
+                counts['errors'] += 1
+                on_error({
+                    'url': url,
+                    'error': str(error),
+                    'timestamp': datetime.now().isoformat()
+                })
+            else:
+                counts['results'] += 1
+                on_result(record)
+            if on_url_done is not None:
+                on_url_done(url, error is None)
+
+        timeout = aiohttp.ClientTimeout(
+            total=TIMEOUT_CONFIG['total_timeout'],
+            sock_connect=TIMEOUT_CONFIG['request_timeout'],
+            sock_read=TIMEOUT_CONFIG['read_timeout']
+        )
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host_concurrency
+        )
+
+        with ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix='parse') as executor, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='sink') as sink:
+            async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout,
+                                             connector=connector) as session:
+                in_flight = {}
+                exhausted = False
+                try:
+                    while True:
+                        if not exhausted and len(in_flight) < max_in_flight:
+                            wanted = max_in_flight - len(in_flight)
+                            batch = await loop.run_in_executor(sink, take, wanted)
+                            exhausted = len(batch) < wanted
+                            for url in batch:
+                                in_flight[asyncio.ensure_future(self.scrape_url(session, url, executor))] = url
+                        if not in_flight:
+                            break
+
+                        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            url = in_flight.pop(task)
+                            error = task.exception()
+                            record = task.result() if error is None else None
+                            await loop.run_in_executor(sink, deliver, url, error, record)
+                finally:
+                    # Interrupción: lo entregado ya está escrito; lo que queda en vuelo se descarta
+                    for task in in_flight:
+                        task.cancel()
+
+        return counts
+
+    def scrape_multiple_urls(self, urls):
+        """Scrapea múltiples URLs (misma interfaz que ``Scraper.scrape_multiple_urls``)"""
+        urls = [CanonicalURL(url) for url in urls]
+        logger.info(f"Starting async batch scrape of {len(urls)} URLs")
+
+        results, errors = asyncio.run(self.run(urls))
+
+        logger.info(f"Batch complete: {len(results)} successful, {len(errors)} errors")
+        return results, errors
+
+
+# Funciones de conveniencia
+def scrape_multiple_companies_async(urls):
+    """Función simple para scrapear múltiples empresas con el motor asíncrono"""
+    return AsyncScraper().scrape_multiple_urls(urls)
+
+def scrape_stream_async(urls, on_result, on_error, on_url_done=None):
+    """Batch con el motor asíncrono entregando cada resultado según termina (ver ``run_stream``)"""
+    return asyncio.run(AsyncScraper().run_stream(urls, on_result, on_error, on_url_done))
+
+
+if __name__ == "__main__":
+    # Prueba offline: varios servidores HTTP locales simulan hosts distintos
+    import tempfile
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from robots_checker import RobotsCache
+    from scraper import Scraper
+
+    LATENCY = 0.3      # segundos de respuesta simulada por página
+    HOSTS = 6
+    URLS_PER_HOST = 5
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/robots.txt':
+                body = b"User-agent: *\nDisallow: /private\n"
+            else:
+                time.sleep(LATENCY)
+                name = self.path.rsplit('/', 1)[-1]
+                body = (
+                    f'<html><head><title>{name}</title></head><body>'
+                    f'<h1 class="profile-name">{name}</h1>'
+                    f'<a href="https://{name}.example/website">{name}.example</a>'
+                    f'<div class="description">Company {name}</div>'
+                    f'<a href="/terms">Terms</a></body></html>'
+                ).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class StandInScraper(Scraper):
+        def get_extractor_for_url(self, url):
+            return self.extractors['crunchbase']
+
+    logging.basicConfig(level=logging.WARNING)
+    servers = []
+    for _ in range(HOSTS):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+    urls = [
+        f"http://127.0.0.1:{server.server_address[1]}/organization/company{host}-{i}"
+        for i in range(URLS_PER_HOST)
+        for host, server in enumerate(servers)
+    ]
+
+    # Cortesía reducida para la prueba, idéntica en ambos motores
+    robots_checker.__init__(cache=RobotsCache(cache_dir=tempfile.mkdtemp()))
+    host_scheduler.base_delay = 0.5
+    host_scheduler.max_requests_per_minute = 600
+    host_scheduler.jitter = (0, 0)
+    stand_in = StandInScraper()
+
+    start = time.perf_counter()
+    sync_results, sync_errors = stand_in.scrape_multiple_urls(urls)
+    sync_elapsed = time.perf_counter() - start
+
+    host_scheduler.buckets.clear()
+    start = time.perf_counter()
+    async_results, async_errors = AsyncScraper(scraper=stand_in).scrape_multiple_urls(urls)
+    async_elapsed = time.perf_counter() - start
+
+    for server in servers:
+        server.shutdown()
+
+    assert len(sync_results) == len(async_results) == len(urls), (sync_errors, async_errors)
+    assert [r['name'] for r in async_results] == [url.rsplit('/', 1)[-1] for url in urls]
+
+    print(f"{len(urls)} URLs across {HOSTS} hosts ({LATENCY}s latency, 0.5s per-host interval)")
+    print(f"  sync : {sync_elapsed:6.2f}s  ({len(urls) / sync_elapsed:5.1f} pages/s)")
+    print(f"  async: {async_elapsed:6.2f}s  ({len(urls) / async_elapsed:5.1f} pages/s)")
+    print(f"  speedup: {sync_elapsed / async_elapsed:.1f}x")
@@ -0,0 +1,142 @@
+"""
+URLs canónicas: normalización por fuente y componentes parseados una sola vez
+"""
+
+from urllib.parse import urlsplit, urlunsplit, unquote
+
+from config import URL_CANONICAL_CONFIG
+
+# Puertos que sobran en el netloc
+DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+
+def domain_candidates(host):
+    """Dominios registrados posibles de un host, del más corto al más largo
+
+    ``www.crunchbase.com`` → ``crunchbase.com``, ``www.crunchbase.com``.
+    Con dos consultas al dict basta para sufijos de un nivel (``.com``) y de
+    dos (``.co.uk``) sin depender de la lista de sufijos públicos.
+    """
+    host = host.rsplit('@', 1)[-1].split(':', 1)[0].rstrip('.')
+    labels = host.split('.')
+    return ['.'.join(labels[-n:]) for n in (2, 3) if len(labels) >= n] or [host]
+
+
+def source_rules(host):
+    """Reglas de canonicalización del sitio de un host ({} si no hay)"""
+    sources = URL_CANONICAL_CONFIG['sources']
+    for domain in domain_candidates(host):
+        rules = sources.get(domain)
+        if rules is not None:
+            return rules
+    return {}
+
+
+def is_tracking_param(name, rules=None):
+    """Indica si un parámetro de la query es de seguimiento (globales + ``drop_params`` del sitio)"""
+    name = unquote(name).lower()
+    params = URL_CANONICAL_CONFIG['tracking_params'] + tuple((rules or {}).get('drop_params', ()))
+    for param in params:
+        if param.endswith('*') and name.startswith(param[:-1]) or name == param:
+            return True
+    return False
+
+
+def canonical_parts(url):
+    """Componentes (``SplitResult``) de la forma canónica de una URL
+
+    Host en minúsculas y sin punto final ni puerto por defecto, host
+    canónico del sitio, sin fragmento, sin barra final, sin parámetros de
+    seguimiento y con las reglas de ``URL_CANONICAL_CONFIG['sources']``.
+    Lo que no es http(s) solo pierde el fragmento.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.netloc:
+        return parts._replace(fragment='')
+
+    netloc = parts.netloc.lower()
+    if netloc.endswith(DEFAULT_PORTS[scheme]):
+        netloc = netloc[:-len(DEFAULT_PORTS[scheme])]
+    netloc = netloc.rstrip('.')
+    netloc = URL_CANONICAL_CONFIG['host_aliases'].get(netloc, netloc)
+    rules = source_rules(netloc)
+
+    path = parts.path or '/'
+    segments = rules.get('lowercase_segments', 0)
+    if segments:
+        # '/organization/Foo/x' → ['', 'organization', 'Foo', 'x']: el resto se deja igual
+        pieces = path.split('/', segments + 1)
+        path = '/'.join([piece.lower() for piece in pieces[:segments + 1]] + pieces[segments + 1:])
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    # Se filtra el texto crudo de cada par para no re-codificar los valores
+    keep = rules.get('keep_params')
+    pairs = []
+    for pair in parts.query.split('&'):
+        name = pair.split('=', 1)[0]
+        if not name or is_tracking_param(name, rules):
+            continue
+        if keep is not None and unquote(name) not in keep:
+            continue
+        pairs.append(pair)
+
+    return parts._replace(scheme=scheme, netloc=netloc, path=path, query='&'.join(pairs), fragment='')
+
+
+class CanonicalURL(str):
+    """URL en forma canónica que conserva sus componentes ya parseados
+
+    Es un ``str`` (sirve como clave de caché, de deduplicación o de
+    archivo), pero robots.txt, el rate limiter y el registro de extractores
+    leen ``parts`` en vez de volver a llamar a ``urlparse``. Construir una
+    CanonicalURL a partir de otra devuelve la misma instancia.
+
+    La forma canónica es solo una clave: al servidor se le pide
+    ``original`` (la URL tal como llegó, sin fragmento). ``original_parts``
+    la guarda parseada; las reglas de robots.txt distinguen mayúsculas y
+    parámetros, así que se comprueban también contra ella.
+    """
+
+    def __new__(cls, url):
+        if isinstance(url, CanonicalURL):
+            return url
+        parts = canonical_parts(url)
+        self = super().__new__(cls, urlunsplit(parts))
+        self.parts = parts
+        self.original_parts = urlsplit(url.strip())
+        return self
+
+    @property
+    def scheme(self):
+        return self.parts.scheme
+
+    @property
+    def netloc(self):
+        return self.parts.netloc
+
+    @property
+    def path(self):
+        return self.parts.path
+
+    @property
+    def query(self):
+        return self.parts.query
+
+    @property
+    def original(self):
+        """URL tal como llegó, sin fragmento: la que se descarga"""
+        return urlunsplit(self.original_parts._replace(fragment=''))
+
+    @property
+    def origin(self):
+        """``scheme://netloc`` (base de robots.txt y de la caché de ToS)"""
+        return f"{self.parts.scheme}://{self.parts.netloc}"
+
+
+def url_parts(url):
+    """Componentes de una URL: los ya parseados si es canónica, si no ``urlsplit``"""
+    if isinstance(url, CanonicalURL):
+        return url.parts
+    return urlsplit(url)
@@ -0,0 +1,178 @@
+"""
+Checkpoints de batch: journal de URLs terminadas para reanudar sin repetir trabajo
+"""
+
+import os
+import re
+import json
+import time
+import secrets
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+
+from config import CHECKPOINT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    finished_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Estados de una URL en el journal
+DONE = 'done'
+FAILED = 'failed'
+
+BATCH_ID_RE = re.compile(r'^[\w.-]+$')
+
+
+def new_batch_id(directory=None):
+    """Id de un batch nuevo: sello de tiempo más un sufijo aleatorio
+
+    El fichero del checkpoint se crea aquí en modo exclusivo, así que dos
+    batches arrancados en el mismo segundo nunca comparten journal ni
+    ficheros de export.
+    """
+    directory = directory or CHECKPOINT_CONFIG['dir']
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        batch_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
+        try:
+            with open(os.path.join(directory, f"{batch_id}.sqlite"), 'x'):
+                return batch_id
+        except FileExistsError:
+            continue
+
+
+class BatchCheckpoint:
+    """Journal en disco (sqlite en modo WAL) de las URLs terminadas de un batch
+
+    Cada URL se marca como ``done`` o ``failed`` al salir del pipeline; al
+    reanudar, ``pending`` descarta las ``done`` con una consulta por clave
+    primaria, sin releer el journal. Las ``failed`` se reintentan.
+
+    Los commits se agrupan cada ``commit_records`` URLs o ``commit_interval``
+    segundos. Antes de cada commit se llama a ``before_commit`` (p. ej. el
+    flush de los exports), de modo que nunca queda marcada como hecha una
+    URL cuyo resultado no esté ya en disco; tras un corte, como mucho se
+    repiten las URLs del último intervalo.
+    """
+
+    def __init__(self, batch_id, directory=None, commit_records=None, commit_interval=None):
+        if not BATCH_ID_RE.match(batch_id):
+            raise ValueError(f"Invalid batch id: {batch_id!r}")
+        self.batch_id = batch_id
+        self.directory = directory or CHECKPOINT_CONFIG['dir']
+        self.commit_records = commit_records or CHECKPOINT_CONFIG['commit_records']
+        self.commit_interval = commit_interval or CHECKPOINT_CONFIG['commit_interval']
+        self.path = os.path.join(self.directory, f"{batch_id}.sqlite")
+        self.before_commit = None
+        self.skipped = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.uncommitted = 0
+        self.last_commit = time.monotonic()
+
+    @classmethod
+    def exists(cls, batch_id, directory=None):
+        """Indica si hay checkpoint para un batch id"""
+        if not BATCH_ID_RE.match(batch_id):
+            return False
+        directory = directory or CHECKPOINT_CONFIG['dir']
+        return os.path.exists(os.path.join(directory, f"{batch_id}.sqlite"))
+
+    # === Metadatos del batch (entrada, ficheros de salida, opciones) ===
+
+    def set_meta(self, **values):
+        """Guarda metadatos del batch (valores serializables a JSON)"""
+        with self.lock:
+            self.db.executemany(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                [(key, json.dumps(value)) for key, value in values.items()]
+            )
+            self.db.commit()
+
+    def meta(self):
+        """Metadatos guardados del batch"""
+        with self.lock:
+            rows = self.db.execute('SELECT key, value FROM meta').fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    # === Journal de URLs ===
+
+    def is_done(self, url):
+        """Indica si la URL ya se completó en una ejecución anterior"""
+        with self.lock:
+            row = self.db.execute('SELECT status FROM urls WHERE url = ?', (url,)).fetchone()
+        return row is not None and row[0] == DONE
+
+    def pending(self, urls):
+        """Genera las URLs que aún no se han completado"""
+        for url in urls:
+            if self.is_done(url):
+                self.skipped += 1
+                continue
+            yield url
+
+    def mark(self, url, ok):
+        """Anota una URL terminada (con éxito o con error)"""
+        status = DONE if ok else FAILED
+        with self.lock:
+            self.db.execute(
+                'INSERT INTO urls (url, status, finished_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET status = excluded.status, '
+                'attempts = attempts + 1, finished_at = excluded.finished_at',
+                (url, status, time.time())
+            )
+            self.uncommitted += 1
+            if (self.uncommitted >= self.commit_records
+                    or time.monotonic() - self.last_commit >= self.commit_interval):
+                self.commit_locked()
+
+    def commit(self):
+        """Hace persistentes las marcas pendientes"""
+        with self.lock:
+            self.commit_locked()
+
+    def commit_locked(self):
+        """``commit`` con el lock ya tomado"""
+        if self.before_commit is not None:
+            self.before_commit()
+        self.db.commit()
+        self.uncommitted = 0
+        self.last_commit = time.monotonic()
+
+    def counts(self):
+        """URLs del journal por estado"""
+        with self.lock:
+            rows = self.db.execute('SELECT status, COUNT(*) FROM urls GROUP BY status').fetchall()
+        return dict(rows)
+
+    def close(self):
+        """Commit final y cierre"""
+        if self.db is None:
+            return
+        self.commit()
+        self.db.close()
+        self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -16,7 +16,8 @@ RATE_LIMIT_CONFIG = {
     'BATCH_SIZE': 10,
     'BATCH_DELAY': 60,
     'MAX_RETRIES': 3,
-    'BACKOFF_MULTIPLIER': 2
+    'BACKOFF_MULTIPLIER': 2,
+    'JITTER_RANGE': (0.5, 1.5)  # segundos extra aleatorios por request y host
 }
 
 # === USER AGENT ===
@@ -46,6 +47,24 @@ TIMEOUT_CONFIG = {
     'total_timeout': 60
 }
 
+# === MOTOR ASÍNCRONO ===
+ASYNC_CONFIG = {
+    'max_connections': 20,       # conexiones simultáneas en total
+    'per_host_concurrency': 1,   # requests en vuelo por host
+    'parse_workers': 1,          # hilos para parsear fuera del event loop
+    'max_in_flight': 100         # URLs en vuelo en batch (acota la memoria)
+}
+
+# === PIPELINE DE BATCH ===
+PIPELINE_CONFIG = {
+    'queue_size': 100,         # elementos máximos por cola entre etapas
+    'frontier_window': 500,    # URLs leídas por ventana para intercalar hosts
+    'fetch_workers': 1,
+    'parse_workers': 1,
+    'validate_workers': 1,
+    'report_interval': 30      # segundos entre reportes de profundidad de colas
+}
+
 # === DIRECTORIOS ===
 DATA_DIR = "data"
 LOGS_DIR = "logs"
@@ -56,25 +75,118 @@ EXPORTS_DIR = "exports"
 for directory in [DATA_DIR, LOGS_DIR, CACHE_DIR, EXPORTS_DIR]:
     os.makedirs(directory, exist_ok=True)
 
+# === CACHÉ HTTP (peticiones condicionales) ===
+HTTP_CACHE_CONFIG = {
+    'enabled': True,
+    'cache_dir': os.path.join(CACHE_DIR, 'http'),
+    'max_size': 512 * 1024 * 1024   # bytes; se desalojan las entradas menos usadas
+}
+
+# Extracción: 'lxml' (XPath compilado) o 'beautifulsoup' (soupsieve)
+EXTRACTION_CONFIG = {
+    'backend': 'lxml',
+    'partial_parsing': True,  # Construir solo los subárboles que leen los extractores
+    'embedded_json': True     # JSON-LD / __NEXT_DATA__ / Apollo antes de parsear el DOM
+}
+
+# Orden adaptativo de selectores: aciertos y fallos por fuente/campo/selector
+SELECTOR_STATS_CONFIG = {
+    'enabled': True,
+    'path': os.path.join(CACHE_DIR, 'selector_stats.json'),
+    'min_attempts': 50,    # Intentos antes de poder relegar un selector
+    'demote_below': 0.02   # Tasa de acierto por debajo de la cual se prueba al final
+}
+
+# Descarga en streaming: se corta en cuanto el extractor tiene sus campos
+STREAMING_CONFIG = {
+    'enabled': False,
+    'chunk_size': 16 * 1024,
+    'first_check': 16 * 1024,            # Bytes recibidos antes de la primera comprobación
+    'max_body_size': 5 * 1024 * 1024     # Límite duro por respuesta
+}
+
+# Archivo de HTML crudo (re-extracción sin volver a descargar)
+ARCHIVE_CONFIG = {
+    'enabled': True,
+    'dir': os.path.join(DATA_DIR, 'archive'),
+    'segment_size': 1024 * 1024 * 1024,  # 1 GiB por segmento
+    'dict_samples': 16,                  # Páginas por fuente para entrenar el diccionario
+    'dict_size': 32 * 1024,              # Máximo que aprovecha zlib
+    'compression_level': 6
+}
+
+# URLs canónicas: la misma página con distinta grafía se descarga una sola vez
+URL_CANONICAL_CONFIG = {
+    # Parámetros de seguimiento que se eliminan siempre ('*' = prefijo)
+    'tracking_params': ('utm_*', 'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid',
+                        'ref_src', 'igshid', '_ga'),
+    # Host canónico de cada sitio
+    'host_aliases': {
+        'crunchbase.com': 'www.crunchbase.com',
+        'www.angel.co': 'angel.co',
+        'producthunt.com': 'www.producthunt.com',
+        'www.github.com': 'github.com'
+    },
+    # Reglas por dominio registrado: primeros segmentos del path que no
+    # distinguen mayúsculas (sección y slug; en GitHub solo la organización,
+    # repos, ramas y ficheros sí las distinguen), parámetros con significado
+    # (None: todos menos los de seguimiento) y parámetros de seguimiento
+    # propios del sitio ('ref' en GitHub es una rama: se conserva)
+    'sources': {
+        'crunchbase.com': {'lowercase_segments': 2, 'keep_params': ('page',)},
+        'angel.co': {'lowercase_segments': 2, 'keep_params': None, 'drop_params': ('ref',)},
+        'producthunt.com': {'lowercase_segments': 2, 'keep_params': ('page',)},
+        'github.com': {'lowercase_segments': 1, 'keep_params': None}
+    }
+}
+
+# Entrada de batch: lectura perezosa y URLs repetidas descartadas
+INPUT_CONFIG = {
+    'dedupe': True,
+    'bloom_capacity': 10_000_000,        # URLs previstas (~18 MB con 0.1% de falsos positivos)
+    'bloom_error_rate': 0.001,
+    'names_bloom_capacity': 10_000,      # Capacidad inicial del conteo de nombres (crece si hace falta)
+    'dedupe_dir': CACHE_DIR              # Conjunto exacto en disco (sqlite temporal)
+}
+
+# Checkpoints de batch: URLs terminadas por batch id, para reanudar con --resume
+CHECKPOINT_CONFIG = {
+    'dir': os.path.join(DATA_DIR, 'checkpoints'),
+    'commit_records': 500,    # URLs marcadas por transacción...
+    'commit_interval': 10     # ...o segundos entre commits
+}
+
 # === CONFIGURACIÓN DE EXPORTACIÓN ===
 EXPORT_CONFIG = {
     'json': {
         'filename': f'{EXPORTS_DIR}/companies_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
         'compression': 'gzip',
         'ensure_ascii': False,
-        'indent': 2
+        'indent': 2,
+        'flush_records': 500,     # Resultados en streaming (JSONL): fsync cada N registros...
+        'flush_interval': 10      # ...o cada N segundos
     },
     'csv': {
         'filename': f'{EXPORTS_DIR}/companies_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
         'encoding': 'utf-8',
         'sep': ',',
-        'index': False
-    }
+        'index': False,
+        'chunk_size': 1000        # Filas por escritura
+    },
+    'parquet': {
+        'row_group_size': 100000,  # Filas por row group
+        'compression': 'snappy'
+    },
+    'formats': []                 # Exports tabulares del batch además del JSONL (parquet, csv)
 }
 
 # === VALIDACIÓN DE ROBOTS.TXT ===
 ROBOTS_CHECK = {
     'enabled': True,
     'user_agent': USER_AGENT,
-    'timeout': 10
+    'timeout': 10,
+    'cache_dir': os.path.join(CACHE_DIR, 'robots'),
+    'cache_ttl': 24 * 3600,     # segundos; TTL por defecto y máximo (RFC 9309)
+    'min_cache_ttl': 300,       # segundos; para errores o respuestas no-cache
+    'tos_cache_ttl': 7 * 24 * 3600  # segundos; sondeo de ToS por host
 }
\ No newline at end of file
@@ -0,0 +1,482 @@
+"""
+Exportadores incrementales de resultados
+"""
+
+import os
+import csv
+import gzip
+import json
+import time
+import zlib
+import logging
+import threading
+from datetime import datetime, date
+
+from config import EXPORT_CONFIG
+
+# Parquet es opcional: solo hace falta pyarrow si se pide ese formato
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Bloque de lectura al revisar un fichero existente
+READ_CHUNK = 1024 * 1024
+
+# Columnas de los exports tabulares (orden y tipos de DOCS/data_contract.md):
+# (columna, tipo, ruta dentro del registro)
+COLUMNS = (
+    ('id', 'string', ('id',)),
+    ('name', 'string', ('name',)),
+    ('website', 'string', ('website',)),
+    ('source', 'string', ('source',)),
+    ('scraped_at', 'timestamp', ('scraped_at',)),
+    ('description', 'string', ('description',)),
+    ('founded_year', 'int', ('founded_year',)),
+    ('city', 'string', ('location', 'city')),
+    ('country', 'string', ('location', 'country')),
+    ('country_code', 'string', ('location', 'country_code')),
+    ('latitude', 'float', ('location', 'coordinates', 'latitude')),
+    ('longitude', 'float', ('location', 'coordinates', 'longitude')),
+    ('industry', 'list', ('industry',)),
+    ('employee_count', 'int', ('employee_count',)),
+    ('funding_total_usd', 'float', ('funding_total', 'amount_usd')),
+    ('last_round_date', 'date', ('funding_total', 'last_round_date')),
+    ('valuation_usd', 'float', ('valuation', 'amount_usd')),
+    ('valuation_date', 'date', ('valuation', 'date')),
+    ('valuation_stage', 'string', ('valuation', 'stage')),
+    ('tags', 'list', ('tags',)),
+    ('linkedin', 'string', ('social_links', 'linkedin')),
+    ('twitter', 'string', ('social_links', 'twitter')),
+    ('facebook', 'string', ('social_links', 'facebook')),
+    ('logo_url', 'string', ('logo_url',)),
+    ('status', 'string', ('status',)),
+    ('source_url', 'string', ('source_url',)),
+)
+
+
+def lookup(record, path):
+    """Valor de una ruta de claves anidadas (None si falta algún nivel)"""
+    value = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def to_column(kind, value):
+    """Convierte un valor al tipo de su columna (None si falta o no es válido)"""
+    if value is None or value == '':
+        return None if kind != 'string' else value
+    try:
+        if kind == 'string':
+            return value if isinstance(value, str) else str(value)
+        if kind == 'int':
+            return int(value)
+        if kind == 'float':
+            return float(value)
+        if kind == 'timestamp':
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if kind == 'date':
+            return date.fromisoformat(value[:10])
+        if kind == 'list':
+            if isinstance(value, str):
+                value = value.split(',')
+            return [str(item).strip() for item in value if str(item).strip()]
+    except (TypeError, ValueError, AttributeError):
+        return None
+    raise ValueError(f"Unknown column type: {kind}")
+
+
+def flatten_record(record):
+    """Fila plana para CSV (mismas columnas que Parquet; listas separadas por comas)"""
+    row = []
+    for _, kind, path in COLUMNS:
+        value = lookup(record, path)
+        if kind == 'list' and isinstance(value, (list, tuple)):
+            value = ','.join(str(item) for item in value)
+        row.append('' if value is None else value)
+    return row
+
+
+def arrow_schema():
+    """Esquema Arrow fijo de los exports Parquet"""
+    types = {
+        'string': pa.string(),
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        'date': pa.date32(),
+        'list': pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types[kind]) for name, kind, _ in COLUMNS])
+
+
+def iter_jsonl(path):
+    """Registros de un fichero JSONL (o .jsonl.gz); una cola cortada se ignora"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        try:
+            for line in f:
+                if line.endswith(b'\n'):
+                    yield json.loads(line)
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            logger.warning(f"Stopped reading truncated {path}")
+
+
+def scan_gzip(path, write=None):
+    """Descomprime un .gz (con uno o varios miembros) pasando los datos a ``write``
+    
+    Devuelve True si el fichero está completo y False si está cortado (último
+    miembro sin cerrar o con datos corruptos al final).
+    """
+    decompressor = zlib.decompressobj(31)
+    in_member = False
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                return not in_member
+            while chunk:
+                try:
+                    data = decompressor.decompress(chunk)
+                except zlib.error:
+                    return False
+                in_member = True
+                if write is not None and data:
+                    write(data)
+                if decompressor.eof:
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(31)
+                    in_member = False
+                else:
+                    chunk = b''
+
+
+class JsonArraySink:
+    """Escribe un array JSON registro a registro, sin acumularlo en memoria"""
+    
+    def __init__(self, filename, indent=2, ensure_ascii=False):
+        self.filename = filename
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self.file = None
+    
+    def open(self):
+        """Abre el fichero y escribe el inicio del array"""
+        self.file = open(self.filename, 'w', encoding='utf-8')
+        self.file.write('[')
+        return self
+    
+    def write(self, record):
+        """Añade un registro al array"""
+        text = json.dumps(record, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        if self.indent:
+            text = '\n'.join(' ' * self.indent + line for line in text.split('\n'))
+        self.file.write(('\n' if self.count == 0 else ',\n') + text)
+        self.count += 1
+    
+    def close(self):
+        """Cierra el array y el fichero"""
+        if self.file is None:
+            return
+        self.file.write('\n]\n' if self.count else ']\n')
+        self.file.close()
+        self.file = None
+        logger.info(f"Wrote {self.count} records to {self.filename}")
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonlSink:
+    """Un registro JSON por línea (JSON Lines), en modo append y opcionalmente gzip
+    
+    Cada ``flush_records`` registros o ``flush_interval`` segundos se vacían
+    los buffers y se hace fsync: tras un corte se conserva todo lo escrito
+    hasta el último volcado. El volcado por tiempo lo hace un hilo aparte,
+    así que también ocurre cuando dejan de llegar registros. Con gzip cada volcado es un punto de
+    sincronización de zlib, así que un fichero truncado se puede leer hasta
+    ahí, y reabrirlo en modo append añade un miembro gzip nuevo (los lectores
+    de gzip los concatenan).
+    """
+    
+    def __init__(self, filename, compression=None, flush_records=None, flush_interval=None,
+                 ensure_ascii=None):
+        json_config = EXPORT_CONFIG['json']
+        # None: la de EXPORT_CONFIG['json']; False: sin comprimir
+        self.compression = (compression if compression is not None else json_config['compression']) or None
+        if self.compression not in (None, 'gzip'):
+            raise ValueError(f"Unsupported compression: {self.compression}")
+        if self.compression == 'gzip' and not filename.endswith('.gz'):
+            filename += '.gz'
+        self.filename = filename
+        self.flush_records = flush_records or json_config['flush_records']
+        self.flush_interval = flush_interval or json_config['flush_interval']
+        self.ensure_ascii = ensure_ascii if ensure_ascii is not None else json_config['ensure_ascii']
+        self.count = 0
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+        self.raw = None
+        self.file = None
+        self.lock = threading.Lock()  # write/flush/close desde el sink y el hilo de volcado
+        self.closing = threading.Event()
+        self.flusher = None
+    
+    def open(self):
+        """Abre el fichero para añadir al final"""
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > 0:
+            self.recover()
+        self.raw = open(self.filename, 'ab')
+        if self.compression == 'gzip':
+            self.file = gzip.GzipFile(fileobj=self.raw, mode='ab')
+        else:
+            self.file = self.raw
+        self.last_flush = time.monotonic()
+        self.closing.clear()
+        self.flusher = threading.Thread(target=self.flush_loop, name='jsonl-flush', daemon=True)
+        self.flusher.start()
+        return self
+    
+    def flush_loop(self):
+        """Hilo de volcado: fsync de lo pendiente cada ``flush_interval`` segundos"""
+        while not self.closing.wait(self.flush_interval):
+            try:
+                with self.lock:
+                    if self.unflushed and time.monotonic() - self.last_flush >= self.flush_interval:
+                        self.flush_locked()
+            except Exception:
+                logger.exception(f"Periodic flush of {self.filename} failed")
+    
+    def recover(self):
+        """Deja listo para añadir un fichero cortado por una caída (al reanudar)
+        
+        Se descarta la línea a medias del final; con gzip, si el último
+        miembro quedó sin cerrar, se reescribe el fichero con lo recuperable
+        (una pasada completa, solo cuando hace falta).
+        """
+        if self.compression != 'gzip':
+            with open(self.filename, 'r+b') as f:
+                end = f.seek(0, os.SEEK_END)
+                pos = end
+                while pos > 0:
+                    step = min(READ_CHUNK, pos)
+                    f.seek(pos - step)
+                    newline = f.read(step).rfind(b'\n')
+                    if newline != -1:
+                        pos = pos - step + newline + 1
+                        break
+                    pos -= step
+                if pos != end:
+                    f.truncate(pos)
+                    logger.warning(f"Dropped {end - pos} bytes of a partial line at the end of {self.filename}")
+            return
+        
+        if scan_gzip(self.filename):
+            return
+        
+        tmp_path = f"{self.filename}.recover"
+        tail = b''
+        with gzip.open(tmp_path, 'wb') as out:
+            def write(data):
+                nonlocal tail
+                data = tail + data
+                cut = data.rfind(b'\n') + 1
+                out.write(data[:cut])
+                tail = data[cut:]
+            scan_gzip(self.filename, write)
+        os.replace(tmp_path, self.filename)
+        logger.warning(f"Recovered truncated {self.filename} up to its last complete line")
+    
+    def write(self, record):
+        """Añade un registro como una línea"""
+        line = json.dumps(record, ensure_ascii=self.ensure_ascii, separators=(',', ':'))
+        with self.lock:
+            self.file.write(line.encode('utf-8') + b'\n')
+            self.count += 1
+            self.unflushed += 1
+            if (self.unflushed >= self.flush_records
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self.flush_locked()
+    
+    def flush(self):
+        """Vuelca lo pendiente hasta el disco (fsync)"""
+        with self.lock:
+            self.flush_locked()
+    
+    def flush_locked(self):
+        """``flush`` con el lock ya tomado"""
+        if self.file is None:
+            return
+        self.file.flush()  # GzipFile: Z_SYNC_FLUSH
+        if self.file is not self.raw:
+            self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+    
+    def close(self):
+        """Vuelca y cierra el fichero"""
+        if self.flusher is not None:
+            self.closing.set()
+            self.flusher.join()
+            self.flusher = None
+        if self.file is None:
+            return
+        if self.file is not self.raw:
+            self.file.close()  # Escribe el final del miembro gzip
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+        self.file = None
+        self.raw = None
+        logger.info(f"Wrote {self.count} records to {self.filename}")
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvSink:
+    """CSV con las columnas de ``COLUMNS``, escrito por bloques de filas"""
+    
+    format_name = 'CSV'
+    
+    def __init__(self, filename, chunk_size=None):
+        csv_config = EXPORT_CONFIG['csv']
+        self.filename = filename
+        self.chunk_size = chunk_size or csv_config['chunk_size']
+        self.encoding = csv_config['encoding']
+        self.sep = csv_config['sep']
+        self.count = 0
+        self.rows = []
+        self.file = None
+        self.writer = None
+    
+    def open(self):
+        """Crea el fichero y escribe la cabecera"""
+        self.file = open(self.filename, 'w', encoding=self.encoding, newline='')
+        self.writer = csv.writer(self.file, delimiter=self.sep, lineterminator='\n')
+        self.writer.writerow([name for name, _, _ in COLUMNS])
+        return self
+    
+    def write(self, record):
+        """Añade un registro (se escribe al completar el bloque)"""
+        self.rows.append(flatten_record(record))
+        self.count += 1
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+    
+    def flush(self):
+        """Escribe las filas pendientes"""
+        if self.file is None or not self.rows:
+            return
+        self.writer.writerows(self.rows)
+        self.rows = []
+        self.file.flush()
+    
+    def close(self):
+        """Escribe lo pendiente y cierra el fichero"""
+        if self.file is None:
+            return
+        self.flush()
+        self.file.close()
+        self.file = None
+        logger.info(f"Wrote {self.count} records to {self.filename}")
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ParquetSink:
+    """Parquet con esquema fijo (``COLUMNS``), escrito por row groups
+    
+    Los registros se acumulan por columnas y cada ``row_group_size`` se
+    escribe un row group, así que la memoria no depende del tamaño del
+    batch. El pie del fichero se escribe al cerrar: un Parquet cortado no se
+    puede leer ni ampliar, por eso se regenera entero desde el JSONL al
+    reanudar un batch.
+    """
+    
+    format_name = 'Parquet'
+    
+    def __init__(self, filename, row_group_size=None, compression=None):
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet export (pip install pyarrow)")
+        parquet_config = EXPORT_CONFIG['parquet']
+        self.filename = filename
+        self.row_group_size = row_group_size or parquet_config['row_group_size']
+        self.compression = compression or parquet_config['compression']
+        self.schema = arrow_schema()
+        self.count = 0
+        self.buffered = 0
+        self.columns = {name: [] for name, _, _ in COLUMNS}
+        self.writer = None
+    
+    def open(self):
+        """Crea el fichero (lo sustituye si ya existía)"""
+        self.writer = pq.ParquetWriter(self.filename, self.schema, compression=self.compression)
+        return self
+    
+    def write(self, record):
+        """Añade un registro al row group en curso"""
+        for name, kind, path in COLUMNS:
+            self.columns[name].append(to_column(kind, lookup(record, path)))
+        self.count += 1
+        self.buffered += 1
+        if self.buffered >= self.row_group_size:
+            self.flush()
+    
+    def flush(self):
+        """Escribe las filas acumuladas como un row group"""
+        if self.writer is None or not self.buffered:
+            return
+        table = pa.Table.from_pydict(self.columns, schema=self.schema)
+        self.writer.write_table(table, row_group_size=self.row_group_size)
+        self.columns = {name: [] for name, _, _ in COLUMNS}
+        self.buffered = 0
+    
+    def close(self):
+        """Escribe el último row group y el pie del fichero"""
+        if self.writer is None:
+            return
+        self.flush()
+        self.writer.close()
+        self.writer = None
+        logger.info(f"Wrote {self.count} records to {self.filename}")
+    
+    def __enter__(self):
+        return self.open()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Exports tabulares disponibles además del JSONL: formato -> (clase, extensión)
+TABLE_SINKS = {
+    'parquet': (ParquetSink, '.parquet'),
+    'csv': (CsvSink, '.csv'),
+}
+
+
+def table_sink(fmt, jsonl_filename):
+    """Sink de ``fmt`` junto al JSONL de resultados (mismo nombre, otra extensión)"""
+    if fmt not in TABLE_SINKS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    sink_class, extension = TABLE_SINKS[fmt]
+    base = jsonl_filename[:-3] if jsonl_filename.endswith('.gz') else jsonl_filename
+    return sink_class(os.path.splitext(base)[0] + extension)
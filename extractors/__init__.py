@@ -0,0 +1,110 @@
+"""
+Registro de extractores: enrutado dominio → extractor con carga perezosa
+"""
+
+import threading
+import importlib
+import logging
+
+from canonical_url import domain_candidates, url_parts
+
+logger = logging.getLogger(__name__)
+
+# Dominio registrado → fuente. Cada fuente vive en ``extractors/<fuente>.py`` y
+# solo se importa la primera vez que llega una URL suya.
+EXTRACTOR_MODULES = {
+    'crunchbase.com': 'crunchbase',
+    'angel.co': 'angellist',
+    'producthunt.com': 'producthunt',
+    'github.com': 'github'
+}
+
+# Hosts (netloc) resueltos que se recuerdan antes de vaciar la caché
+MAX_CACHED_HOSTS = 4096
+
+
+class ExtractorRegistry:
+    """Extractores por fuente y tabla de enrutado por dominio registrado
+
+    Las clases se registran con el decorador ``register`` al importar su
+    módulo. Los módulos de ``EXTRACTOR_MODULES`` se importan (y su
+    extractor se instancia) en el primer uso, de modo que añadir fuentes no
+    encarece el arranque ni el enrutado, que es una consulta a un dict.
+    """
+
+    def __init__(self, domains):
+        self.domains = dict(domains)
+        self.classes = {}
+        self.instances = {}
+        self.hosts = {}
+        self.lock = threading.RLock()
+
+    def register(self, source, *domains):
+        """Decorador que registra la clase extractora de ``source`` y sus dominios"""
+        def decorator(cls):
+            with self.lock:
+                self.classes[source] = cls
+                for domain in domains:
+                    self.domains[domain.lower()] = source
+                self.hosts.clear()
+            return cls
+        return decorator
+
+    def sources(self):
+        """Nombres de todas las fuentes conocidas (cargadas o no)"""
+        return list(dict.fromkeys(list(self.domains.values()) + list(self.classes)))
+
+    def get(self, source):
+        """Extractor de una fuente, importando su módulo si hace falta"""
+        extractor = self.instances.get(source)
+        if extractor is not None:
+            return extractor
+
+        with self.lock:
+            extractor = self.instances.get(source)
+            if extractor is None:
+                if source not in self.classes:
+                    if source not in self.domains.values():
+                        raise KeyError(source)
+                    importlib.import_module(f"{__name__}.{source}")
+                extractor = self.classes[source]()
+                self.instances[source] = extractor
+                logger.debug(f"Loaded extractor for {source}")
+        return extractor
+
+    __getitem__ = get
+
+    def source_for_host(self, host):
+        """Fuente de un host (None si ningún extractor lo cubre)"""
+        try:
+            return self.hosts[host]
+        except KeyError:
+            pass
+
+        source = None
+        for domain in domain_candidates(host):
+            source = self.domains.get(domain)
+            if source is not None:
+                break
+
+        if len(self.hosts) >= MAX_CACHED_HOSTS:
+            self.hosts.clear()
+        self.hosts[host] = source
+        return source
+
+    def for_url(self, url):
+        """Extractor para una URL (None si la fuente no está soportada)"""
+        source = self.source_for_host(url_parts(url).netloc.lower())
+        if source is None:
+            return None
+        return self.get(source)
+
+    def values(self):
+        """Todos los extractores (carga los que aún no se hayan usado)"""
+        return [self.get(source) for source in self.sources()]
+
+
+# Instancia global
+registry = ExtractorRegistry(EXTRACTOR_MODULES)
+register = registry.register
+
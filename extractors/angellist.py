@@ -0,0 +1,59 @@
+"""
+Extractor de perfiles de startup de AngelList
+"""
+
+from extractors import register
+from extractors.base import DataExtractor
+
+
+@register('angellist', 'angel.co')
+class AngelListExtractor(DataExtractor):
+    """Extractor específico para AngelList"""
+    
+    # 'a[href^="http"]' no debe tomar enlaces de la navegación o del footer
+    skip_tags = DataExtractor.skip_tags + ('nav', 'footer')
+    embedded_types = ('Organization', 'Corporation', 'Startup')
+    # Tagline como descripción
+    description_field = 'tagline'
+    
+    def __init__(self):
+        super().__init__('angellist')
+        self.selectors = {
+            'company_name': [
+                '.startup-name',
+                'h1[class*="name"]',
+                '.profile-title'
+            ],
+            'website': [
+                '.company-url',
+                'a[href^="http"]',
+                '.website-link'
+            ],
+            'tagline': [
+                '.tagline',
+                '.company-tagline',
+                '.profile-tagline'
+            ],
+            # Listas de startups (/companies, carga inicial de ~50)
+            'listing_item': [
+                '.company-listing',
+                '.startup',
+                '[data-test="StartupResult"]'
+            ],
+            'listing_name': [
+                '.startup-link',
+                '.startup-name',
+                'h2'
+            ],
+            'listing_website': [
+                '.website-link',
+                '.company-url',
+                'a.website'
+            ],
+            'listing_description': [
+                '.pitch',
+                '.tagline',
+                '.blurb'
+            ]
+        }
+        self.compile_selectors()
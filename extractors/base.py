@@ -0,0 +1,285 @@
+"""
+Extractor base: parseo, selectores y construcción del registro
+"""
+
+import time
+import hashlib
+import logging
+from datetime import datetime
+
+from bs4 import BeautifulSoup, Tag
+
+from config import BASE_URLS, EXTRACTION_CONFIG
+from selector_engine import CompiledSelectors, parse_html, strip_elements
+from embedded_data import extract_embedded
+from selector_stats import selector_stats
+
+logger = logging.getLogger(__name__)
+
+
+class DataExtractor:
+    """Extractor base de datos"""
+    
+    # Elementos que ningún selector lee: se quitan del HTML antes de parsear
+    skip_tags = ('script', 'style', 'noscript', 'template', 'svg', 'iframe')
+    # Etiquetas que contienen todos los campos (None: cualquier parte del body); si
+    # falta algún campo del registro se reparsea el documento completo
+    parse_regions = None
+    # Tipos de objeto (schema.org @type / GraphQL __typename) con los datos del registro
+    embedded_types = ()
+    # Grupos de ``self.selectors`` que deben tener valor para dejar de descargar (modo
+    # streaming); None: todos los que rellena ``extract_data``
+    required_selectors = None
+    # Grupos de ``self.selectors`` que dan el nombre y la descripción del registro
+    name_field = 'company_name'
+    description_field = 'description'
+    # Grupos de ``self.selectors`` de las páginas de listado: 'listing_item' localiza
+    # cada entrada y los demás se evalúan dentro de ella
+    listing_fields = ('listing_item', 'listing_name', 'listing_website', 'listing_description')
+    
+    def __init__(self, source_name):
+        self.source_name = source_name
+        self.base_url = BASE_URLS.get(source_name)
+        self.selectors = {}
+        self.compiled_selectors = None
+    
+    def compile_selectors(self):
+        """Compila ``self.selectors`` a XPath una sola vez (lo llama cada extractor al construirse)"""
+        self.compiled_selectors = CompiledSelectors(self.selectors)
+        for selector in self.compiled_selectors.failed:
+            logger.warning(f"{self.source_name}: selector {selector!r} not supported by lxml backend; "
+                           f"using BeautifulSoup")
+    
+    def parse(self, content, regions=True):
+        """Parsea el HTML con el backend configurado
+        
+        Con el backend ``lxml`` devuelve un árbol ``lxml.html`` sobre el que se
+        evalúan los XPath compilados; si algún selector no compila o el
+        documento no es parseable, se usa BeautifulSoup como hasta ahora.
+        Con ``partial_parsing`` no se construye nada de ``skip_tags`` y, si el
+        extractor declara ``parse_regions`` (y ``regions`` es True), solo esas
+        regiones.
+        """
+        partial = EXTRACTION_CONFIG['partial_parsing']
+        if (EXTRACTION_CONFIG['backend'] == 'lxml' and self.compiled_selectors is not None
+                and self.compiled_selectors.complete):
+            if partial:
+                tree = parse_html(content, self.skip_tags, self.parse_regions if regions else None)
+            else:
+                tree = parse_html(content)
+            if tree is not None:
+                return tree
+        if partial:
+            content = strip_elements(content, self.skip_tags)
+        return BeautifulSoup(content, 'lxml')
+    
+    def extract_embedded(self, content, url):
+        """Campos del registro desde JSON-LD / __NEXT_DATA__ / Apollo, sin construir el DOM"""
+        return extract_embedded(content, url, self.embedded_types)
+    
+    def required_fields(self):
+        """Grupos de selectores que deben tener valor antes de cortar una descarga"""
+        if self.required_selectors is not None:
+            return self.required_selectors
+        return (self.name_field, 'website', self.description_field)
+    
+    def has_required_fields(self, content, tree, url):
+        """Indica si lo descargado hasta ahora ya contiene todos los campos del registro
+        
+        Cortar antes perdería los campos que aparecen más abajo en la página
+        (p. ej. la descripción), así que se exigen todos los que rellena
+        ``extract_data``.
+        """
+        if EXTRACTION_CONFIG['embedded_json']:
+            fields = self.extract_embedded(content, url)
+            if all(fields.values()):
+                return True
+        
+        required = self.required_fields()
+        if tree is None or not required or self.compiled_selectors is None:
+            return False
+        return all(
+            self.compiled_selectors.first_text(tree, self.selectors[key], complete_only=True)
+            for key in required
+        )
+    
+    def parsed_regions(self):
+        """Indica si ``parse`` conserva solo ``parse_regions`` (y puede perder campos)"""
+        return bool(self.parse_regions) and EXTRACTION_CONFIG['partial_parsing']
+    
+    def build_record(self, fields, url):
+        """Registro completo a partir de campos ya extraídos (camino rápido JSON)"""
+        data = self.extract_basic_data(None, url)
+        data.update(fields)
+        if data['website'] and not data['website'].startswith('http'):
+            data['website'] = f"https://{data['website']}"
+        data['id'] = self.generate_id(data)
+        return data
+    
+    def complete_record(self, data, fields):
+        """Rellena los campos vacíos del registro DOM con los datos embebidos"""
+        missing_key = not (data['name'] and data['website'])
+        for key, value in fields.items():
+            if value and not data.get(key):
+                data[key] = value
+        if missing_key and data['name'] and data['website']:
+            if not data['website'].startswith('http'):
+                data['website'] = f"https://{data['website']}"
+            data['id'] = self.generate_id(data)
+        return data
+    
+    def release(self, document):
+        """Libera el documento parseado en cuanto se ha extraído el registro"""
+        if isinstance(document, BeautifulSoup):
+            document.decompose()  # Rompe los ciclos padre/hijo sin esperar al GC
+    
+    def extract_data(self, soup, url):
+        """Extrae el registro del documento con los selectores del extractor"""
+        data = self.extract_basic_data(soup, url)
+        
+        # Nombre
+        data['name'] = self.extract_field(soup, self.name_field)
+        
+        # Website
+        website = self.extract_field(soup, 'website')
+        if website and not website.startswith('http'):
+            website = f"https://{website}"
+        data['website'] = website
+        
+        # Descripción (o tagline)
+        data['description'] = self.extract_field(soup, self.description_field)
+        
+        # Generar ID único
+        data['id'] = self.generate_id(data)
+        
+        return data
+    
+    def has_listings(self):
+        """Indica si el extractor sabe leer páginas de listado de su fuente"""
+        return all(field in self.selectors for field in self.listing_fields)
+    
+    def extract_listing(self, document, url):
+        """Un registro por cada entrada de una página de listado (búsquedas, rankings...)"""
+        if not self.has_listings():
+            raise ValueError(f"No listing selectors for {self.source_name}")
+        
+        records = []
+        seen = set()
+        for item in self.find_elements(document, 'listing_item'):
+            data = self.extract_basic_data(item, url)
+            data['name'] = self.extract_field(item, 'listing_name')
+            
+            website = self.extract_field(item, 'listing_website')
+            if website and not website.startswith('http'):
+                website = f"https://{website}"
+            data['website'] = website
+            
+            data['description'] = self.extract_field(item, 'listing_description')
+            
+            # Entradas sin nombre o repetidas (p. ej. destacadas) no dan registro
+            key = (data['name'], data['website'])
+            if not data['name'] or key in seen:
+                continue
+            seen.add(key)
+            
+            data['id'] = self.generate_id(data)
+            records.append(data)
+        
+        return records
+    
+    def find_elements(self, document, field):
+        """Elementos del primer selector de ``field`` que encuentre alguno (los que nunca aciertan, al final)"""
+        selectors = self.selectors[field]
+        if selector_stats is not None:
+            selectors = selector_stats.ordered(self.source_name, field, selectors)
+        
+        for selector in selectors:
+            if isinstance(document, Tag):
+                try:
+                    elements = document.select(selector)
+                except Exception as e:
+                    logger.debug(f"Selector failed: {selector} - {e}")
+                    continue
+            else:
+                xpath = self.compiled_selectors.compiled.get(selector)
+                if xpath is None:
+                    continue
+                elements = xpath(document)
+            
+            if elements:
+                if selector_stats is not None:
+                    selector_stats.record(self.source_name, field, selectors, selector)
+                return elements
+        if selector_stats is not None:
+            selector_stats.record(self.source_name, field, selectors, None)
+        return []
+    
+    def extract_field(self, document, field):
+        """Valor de un campo de ``self.selectors`` (orden declarado; los que nunca aciertan, al final)"""
+        selectors = self.selectors[field]
+        if selector_stats is not None:
+            selectors = selector_stats.ordered(self.source_name, field, selectors)
+        
+        text, selector = self.find_with_selectors(document, selectors)
+        if selector_stats is not None:
+            selector_stats.record(self.source_name, field, selectors, selector)
+        return text
+    
+    def extract_with_selectors(self, document, selectors):
+        """Intenta múltiples selectores hasta encontrar datos"""
+        return self.find_with_selectors(document, selectors)[0]
+    
+    def find_with_selectors(self, document, selectors):
+        """Devuelve (texto, selector que lo encontró) o ("", None)"""
+        if not isinstance(document, Tag):
+            return self.compiled_selectors.first_match(document, selectors)
+        
+        for selector in selectors:
+            try:
+                elements = document.select(selector)
+                if elements:
+                    # Tomar el primer elemento no vacío
+                    for element in elements:
+                        text = element.get_text(strip=True)
+                        if text:
+                            return text, selector
+            except Exception as e:
+                logger.debug(f"Selector failed: {selector} - {e}")
+                continue
+        return "", None
+        
+    def generate_id(self, data):
+        """Genera ID único para un registro"""
+        timestamp = int(time.time() * 1000)  # milliseconds
+        identifier = f"{self.source_name}_{timestamp}"
+        
+        # Si tenemos nombre y website, agregar hash
+        if data.get('name') and data.get('website'):
+            hash_input = f"{data['name']}_{data['website']}"
+            hash_suffix = hashlib.md5(hash_input.encode()).hexdigest()[:8]
+            identifier = f"{self.source_name}_{timestamp}_{hash_suffix}"
+        
+        return identifier
+    
+    def extract_basic_data(self, soup, url):
+        """Extrae datos básicos del HTML"""
+        return {
+            'id': None,  # Se genera después
+            'name': '',
+            'website': '',
+            'description': '',
+            'source': self.source_name,
+            'scraped_at': datetime.utcnow().isoformat() + 'Z',
+            'source_url': url
+        }
+    
+    def validate_data(self, data):
+        """Valida datos extraídos"""
+        if not data.get('name') or not data.get('website'):
+            return False, "Missing required fields"
+        
+        # Validar URL
+        if not data['website'].startswith(('http://', 'https://')):
+            return False, "Invalid URL format"
+        
+        return True, "Valid"
@@ -0,0 +1,57 @@
+"""
+Extractor de perfiles de organización de Crunchbase
+"""
+
+from extractors import register
+from extractors.base import DataExtractor
+
+
+@register('crunchbase', 'crunchbase.com')
+class CrunchbaseExtractor(DataExtractor):
+    """Extractor específico para Crunchbase"""
+    
+    # Navegación y footer son bloques enormes de enlaces sin datos del perfil
+    skip_tags = DataExtractor.skip_tags + ('nav', 'footer')
+    embedded_types = ('Organization', 'Corporation')
+    
+    def __init__(self):
+        super().__init__('crunchbase')
+        self.selectors = {
+            'company_name': [
+                'h1[class*="profile"]',
+                '.profile-header h1',
+                'h1.company-name'
+            ],
+            'website': [
+                'a[href*="website"]',
+                '[data-test="company-website"]',
+                '.company-link a'
+            ],
+            'description': [
+                '.description',
+                '.about-company',
+                '.company-summary'
+            ],
+            # Búsquedas (/discover/organization.companies, /organizations?page=N)
+            'listing_item': [
+                '.organization-listing',
+                'grid-row',
+                '.results-list li'
+            ],
+            'listing_name': [
+                '.identifier-label',
+                'a[href*="/organization/"]',
+                '.company-name'
+            ],
+            'listing_website': [
+                'a[href*="website"]',
+                '.company-link a',
+                '.website'
+            ],
+            'listing_description': [
+                '.short-description',
+                '.description',
+                '.company-summary'
+            ]
+        }
+        self.compile_selectors()
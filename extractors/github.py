@@ -0,0 +1,35 @@
+"""
+Extractor de páginas de organización de GitHub
+"""
+
+from extractors import register
+from extractors.base import DataExtractor
+
+
+@register('github', 'github.com')
+class GitHubExtractor(DataExtractor):
+    """Extractor específico para organizaciones de GitHub"""
+    
+    skip_tags = DataExtractor.skip_tags + ('nav', 'footer')
+    embedded_types = ('Organization',)
+    
+    def __init__(self):
+        super().__init__('github')
+        self.selectors = {
+            'company_name': [
+                'h1[itemprop="name"]',
+                'h1.h2.lh-condensed',
+                '.org-name'
+            ],
+            'website': [
+                'a[itemprop="url"]',
+                'li[itemprop="url"] a',
+                '.org-header-links a[rel~="nofollow"]'
+            ],
+            'description': [
+                '[itemprop="description"]',
+                '.org-description',
+                '.color-fg-muted.mb-2'
+            ]
+        }
+        self.compile_selectors()
@@ -0,0 +1,59 @@
+"""
+Extractor de fichas de producto de Product Hunt
+"""
+
+from extractors import register
+from extractors.base import DataExtractor
+
+
+@register('producthunt', 'producthunt.com')
+class ProductHuntExtractor(DataExtractor):
+    """Extractor específico para Product Hunt"""
+    
+    skip_tags = DataExtractor.skip_tags + ('nav', 'footer')
+    embedded_types = ('Product', 'Post', 'SoftwareApplication', 'WebApplication', 'MobileApplication')
+    name_field = 'product_name'
+    # Tagline como descripción
+    description_field = 'tagline'
+    
+    def __init__(self):
+        super().__init__('producthunt')
+        self.selectors = {
+            'product_name': [
+                'h1[class*="name"]',
+                '.product-title',
+                '.item-title'
+            ],
+            'website': [
+                '.website-link',
+                'a[href^="http"]',
+                '.product-link'
+            ],
+            'tagline': [
+                '.tagline',
+                '.product-tagline',
+                '.summary'
+            ],
+            # Leaderboards diarios y /posts?page=N
+            'listing_item': [
+                '.post-listing',
+                '.product-item',
+                '[data-test^="post-item"]'
+            ],
+            'listing_name': [
+                '[data-test^="post-name"]',
+                '.product-title',
+                '.item-title'
+            ],
+            'listing_website': [
+                '.website-link',
+                '.product-link',
+                'a[rel~="nofollow"]'
+            ],
+            'listing_description': [
+                '.tagline',
+                '.product-tagline',
+                '.summary'
+            ]
+        }
+        self.compile_selectors()
@@ -0,0 +1,258 @@
+"""
+Caché HTTP en disco con peticiones condicionales (ETag / Last-Modified)
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import logging
+
+from requests.adapters import HTTPAdapter
+
+from config import HTTP_CACHE_CONFIG
+from rate_limiter import metrics
+from canonical_url import CanonicalURL
+from archive import page_archive
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPCache:
+    """Validadores y cuerpos de respuestas 200 guardados bajo ``cache_dir``
+
+    Cada URL se guarda como ``<sha256>.json`` (validadores y cabeceras) y
+    ``<sha256>.body`` (cuerpo ya descomprimido), repartidos en
+    subdirectorios por los dos primeros caracteres del hash. Las
+    escrituras son atómicas, así que varios hilos o procesos pueden
+    compartir la caché.
+
+    Con el archivo de HTML crudo activo el cuerpo no se duplica: los
+    metadatos guardan su hash y se lee del archivo. La caché ocupa como
+    mucho ``max_size`` bytes; al pasarse se borran las entradas usadas hace
+    más tiempo (cada acierto actualiza la fecha de los metadatos).
+    """
+
+    # Cabeceras que se conservan para reconstruir la respuesta servida desde disco
+    KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+    def __init__(self, cache_dir=None, max_size=None, archive=page_archive):
+        self.cache_dir = cache_dir or HTTP_CACHE_CONFIG['cache_dir']
+        self.max_size = max_size or HTTP_CACHE_CONFIG['max_size']
+        self.archive = archive
+        self.lock = threading.Lock()
+        self.size = None  # Bytes en disco (se calcula en la primera escritura)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def paths_for(self, url):
+        """Rutas (meta, cuerpo) de una URL"""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        directory = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(directory, f"{key}.json"), os.path.join(directory, f"{key}.body")
+
+    def lookup(self, url):
+        """Metadatos guardados para una URL, o None"""
+        meta_path, _ = self.paths_for(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url, entry=None):
+        """Cabeceras If-None-Match / If-Modified-Since para revalidar una URL"""
+        entry = entry if entry is not None else self.lookup(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load_body(self, url, entry=None):
+        """Cuerpo guardado para una URL, o None si falta"""
+        meta_path, body_path = self.paths_for(url)
+        entry = entry if entry is not None else self.lookup(url)
+        try:
+            if entry and entry.get('archive_hash'):
+                if self.archive is None:
+                    return None
+                body = self.archive.get(entry['archive_hash'])
+            else:
+                with open(body_path, 'rb') as f:
+                    body = f.read()
+            os.utime(meta_path)  # Usada ahora: la última en desalojarse
+        except (OSError, KeyError):
+            return None
+        return body
+
+    def store(self, url, headers, body):
+        """Guarda una respuesta 200 si trae validadores y permite cachear"""
+        cache_control = (headers.get('Cache-Control') or '').lower()
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if 'no-store' in cache_control or not (etag or last_modified):
+            return False
+
+        meta_path, body_path = self.paths_for(url)
+        directory = os.path.dirname(meta_path)
+        os.makedirs(directory, exist_ok=True)
+
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'headers': {name: headers[name] for name in self.KEPT_HEADERS if name in headers},
+            'size': len(body)
+        }
+        if self.archive is not None:
+            # El scraper archiva el mismo cuerpo: basta con su hash
+            entry['archive_hash'] = hashlib.sha256(body).hexdigest()
+        meta = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+
+        try:
+            # Primero el cuerpo y después los metadatos que lo referencian
+            if self.archive is None:
+                self.atomic_write(directory, body_path, body)
+            else:
+                self.remove(body_path)  # Cuerpo de una versión anterior sin archivo
+            self.atomic_write(directory, meta_path, meta)
+        except OSError as e:
+            logger.warning(f"Could not store HTTP cache entry for {url}: {e}")
+            return False
+
+        self.account(len(meta) + (len(body) if self.archive is None else 0))
+        return True
+
+    def account(self, written):
+        """Suma lo escrito al tamaño de la caché y desaloja si pasa de ``max_size``"""
+        with self.lock:
+            if self.size is None:
+                self.size = self.disk_usage()[0]
+            else:
+                self.size += written
+            if self.size > self.max_size:
+                self.evict()
+
+    def disk_usage(self):
+        """(bytes totales, [(última uso, bytes, meta, cuerpo)]) de las entradas en disco"""
+        total = 0
+        entries = []
+        for directory in os.scandir(self.cache_dir):
+            if not directory.is_dir():
+                continue
+            for item in os.scandir(directory.path):
+                if not item.name.endswith('.json'):
+                    continue
+                body_path = item.path[:-len('.json')] + '.body'
+                try:
+                    stat = item.stat()
+                    size = stat.st_size
+                    if os.path.exists(body_path):
+                        size += os.path.getsize(body_path)
+                except OSError:
+                    continue  # Borrada por otro proceso
+                total += size
+                entries.append((stat.st_mtime, size, item.path, body_path))
+        return total, entries
+
+    def evict(self):
+        """Borra las entradas usadas hace más tiempo hasta bajar al 90% de ``max_size``"""
+        total, entries = self.disk_usage()
+        target = self.max_size * 0.9
+        removed = 0
+        for _, size, meta_path, body_path in sorted(entries):
+            if total <= target:
+                break
+            # Primero los metadatos: sin ellos la URL ya no cuenta como cacheada
+            self.remove(meta_path)
+            self.remove(body_path)
+            total -= size
+            removed += 1
+        self.size = total
+        if removed:
+            logger.info(f"HTTP cache over {self.max_size} bytes: evicted {removed} entries")
+
+    @staticmethod
+    def remove(path):
+        """Borra un fichero si existe"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def atomic_write(directory, path, data):
+        """Escribe un fichero completo o nada (tempfile + os.replace)"""
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class CachingAdapter(HTTPAdapter):
+    """Adapter de requests que revalida contra ``HTTPCache`` y sirve los 304 desde disco
+
+    Las respuestas servidas desde caché se devuelven como 200 con el cuerpo
+    guardado y ``response.from_cache = True``, de modo que el resto del
+    scraper no distingue entre una descarga completa y una revalidación.
+    """
+
+    def __init__(self, cache, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET' or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        # Se pide la URL original, pero la clave es la canónica
+        url = CanonicalURL(request.url)
+        entry = self.cache.lookup(url)
+        if entry:
+            for name, value in self.cache.conditional_headers(url, entry).items():
+                request.headers.setdefault(name, value)
+
+        response = super().send(request, stream=stream, **kwargs)
+        response.from_cache = False
+
+        if response.status_code == 304 and entry:
+            body = self.cache.load_body(url, entry)
+            if body is not None:
+                response.status_code = 200
+                response.reason = 'OK (cached)'
+                response._content = body
+                response.headers.pop('Content-Encoding', None)
+                response.headers['Content-Length'] = str(len(body))
+                for name, value in entry.get('headers', {}).items():
+                    response.headers.setdefault(name, value)
+                response.from_cache = True
+                metrics.update_cache(hit=True, bytes_saved=len(body))
+                logger.debug(f"HTTP cache hit (304): {url}")
+                return response
+
+            # Metadatos sin cuerpo: repetir sin validadores
+            logger.warning(f"HTTP cache body missing for {url}; refetching")
+            request.headers.pop('If-None-Match', None)
+            request.headers.pop('If-Modified-Since', None)
+            response = super().send(request, stream=stream, **kwargs)
+            response.from_cache = False
+
+        if response.status_code == 200:
+            metrics.update_cache(hit=False)
+            self.cache.store(url, response.headers, response.content)
+
+        return response
+
+
+# Instancia global (None si la caché está desactivada)
+http_cache = HTTPCache() if HTTP_CACHE_CONFIG['enabled'] else None
@@ -9,13 +9,22 @@ import logging
 import sys
 import json
 import os
+import itertools
 from datetime import datetime
+from contextlib import ExitStack
 
 # Importar módulos del scraper
-from config import PROJECT_NAME, VERSION, EXPORT_CONFIG
+from config import PROJECT_NAME, VERSION, EXPORT_CONFIG, ARCHIVE_CONFIG, STREAMING_CONFIG, INPUT_CONFIG
 from scraper import scraper, scrape_company, scrape_multiple_companies
 from rate_limiter import metrics, rate_limiter
 from robots_checker import check_site_compliance
+from pipeline import BatchPipeline
+from exporters import JsonlSink, iter_jsonl, table_sink
+from reextract import reextract_archive
+from url_input import iter_urls, URLDeduplicator, GrowingBloomFilter
+from canonical_url import CanonicalURL
+from checkpoint import BatchCheckpoint, new_batch_id
+from selector_stats import selector_stats
 from qa_checklist import run_qa_pipeline
 
 # Configurar logging
@@ -88,8 +97,8 @@ def scrape_single(url):
         print(f"URL: {url}")
         print("Checking compliance...")
         
-        # Verificar compliance
-        compliance = check_site_compliance(url)
+        # Verificar compliance (ToS se revisa sobre la página descargada)
+        compliance = check_site_compliance(url, check_tos=False)
         print(f"Allowed: {compliance['overall_allowed']}")
         print(f"Recommended delay: {compliance['recommended_delay']}s")
         
@@ -123,80 +132,216 @@ def scrape_single(url):
         print(f"Failed: {e}")
         return False
 
-def scrape_batch(urls_file):
-    """Scrapea múltiples URLs desde un archivo"""
+def scrape_batch(urls_file, use_async=False, workers=1, parse_workers=0, listings=False, resume=None,
+                 formats=None):
+    """Scrapea múltiples URLs desde un archivo (con ``listings``, páginas de listado)
+    
+    Con ``resume`` se reanuda el batch de ese id: se saltan las URLs ya
+    completadas y se sigue escribiendo en los mismos ficheros de export.
+    ``formats`` añade exports tabulares (parquet, csv) junto al JSONL.
+    """
     print(f"\n*** BATCH SCRAPING ***")
     print("=" * 50)
     
-    # Leer URLs del archivo
+    # Batch a reanudar: entrada, opciones y ficheros del checkpoint
+    batch_meta = {}
+    if resume:
+        if not BatchCheckpoint.exists(resume):
+            print(f"No checkpoint found for batch {resume}")
+            return False
+        with BatchCheckpoint(resume) as checkpoint:
+            batch_meta = checkpoint.meta()
+        if not urls_file and batch_meta.get('input') == '-':
+            print(f"Batch {resume} read its URLs from stdin; pipe them again with '-'")
+            return False
+        urls_file = urls_file or batch_meta.get('input')
+        listings = batch_meta.get('listings', listings)
+        formats = batch_meta.get('formats', formats)
+    if formats is None:
+        formats = EXPORT_CONFIG['formats']
+    
+    # Leer URLs de forma perezosa: el archivo (también .gz) o '-' para stdin
     try:
-        with open(urls_file, 'r') as f:
-            urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-        
-        print(f"Loaded {len(urls)} URLs from {urls_file}")
+        urls = iter_urls(urls_file)
+        first_url = next(urls, None)
         
-        if len(urls) == 0:
+        if first_url is None:
             print("No URLs found")
             return False
         
+        print(f"Reading URLs from {'stdin' if urls_file == '-' else urls_file}")
+        
         # Mostrar primera URL como ejemplo
-        print(f"Example URL: {urls[0]}")
+        print(f"Example URL: {first_url}")
+        urls = itertools.chain([first_url], urls)
         
     except Exception as e:
         print(f"Error reading file: {e}")
         return False
     
-    # Confirmar antes de continuar
-    print(f"\nThis will scrape {len(urls)} URLs")
-    print("This may take several minutes/hours depending on rate limiting.")
-    response = input("Continue? (y/N): ")
-    
-    if response.lower() != 'y':
-        print("Cancelled")
-        return False
+    # Confirmar antes de continuar (con stdin, la entrada son las URLs)
+    if urls_file != '-':
+        print(f"\nThis will scrape every URL in {urls_file}")
+        print("This may take several minutes/hours depending on rate limiting.")
+        response = input("Continue? (y/N): ")
+        
+        if response.lower() != 'y':
+            print("Cancelled")
+            return False
     
     try:
         print("\nStarting batch scrape...")
-        results, errors = scrape_multiple_companies(urls)
         
-        # Generar reporte
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        batch_id = resume or new_batch_id()
         
-        # Guardar resultados
-        results_file = f"exports/batch_results_{timestamp}.json"
-        errors_file = f"exports/batch_errors_{timestamp}.json"
+        # Los resultados se escriben (y se vuelcan a disco) según salen del pipeline
+        results_file = batch_meta.get('results_file', f"exports/batch_results_{batch_id}.jsonl")
+        errors_file = batch_meta.get('errors_file', f"exports/batch_errors_{batch_id}.jsonl")
+        # Nombres distintos con memoria proporcional al batch (aproximado: un falso positivo no cuenta)
+        seen_names = GrowingBloomFilter(INPUT_CONFIG['names_bloom_capacity'], INPUT_CONFIG['bloom_error_rate'])
+        unique_names = 0
+        with_website = 0
         
-        with open(results_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        # Exports tabulares: se escriben por bloques a la vez que el JSONL
+        results_sink = JsonlSink(results_file)
+        errors_sink = JsonlSink(errors_file)
+        table_sinks = [table_sink(fmt, results_sink.filename) for fmt in formats]
         
-        with open(errors_file, 'w', encoding='utf-8') as f:
-            json.dump(errors, f, indent=2, ensure_ascii=False)
+        # Una URL repetida en la entrada (también con otra grafía) no se vuelve a descargar
+        urls = map(CanonicalURL, urls)
+        deduplicator = URLDeduplicator() if INPUT_CONFIG['dedupe'] else None
+        if deduplicator is not None:
+            urls = deduplicator.filter(urls)
+        
+        with ExitStack() as stack:
+            if deduplicator is not None:
+                stack.enter_context(deduplicator)
+            
+            # Las URLs completadas en ejecuciones anteriores no se vuelven a descargar
+            checkpoint = stack.enter_context(BatchCheckpoint(batch_id))
+            if resume:
+                done = checkpoint.counts()
+                print(f"Resuming batch {batch_id}: {done.get('done', 0)} URLs done, "
+                      f"{done.get('failed', 0)} failed (will be retried)")
+            else:
+                checkpoint.set_meta(input=urls_file, listings=listings, formats=formats,
+                                    results_file=results_file, errors_file=errors_file)
+                print(f"Batch id: {batch_id} (resume with --resume {batch_id})")
+            urls = checkpoint.pending(urls)
+            
+            for sink in table_sinks:
+                stack.enter_context(sink)
+            # Un Parquet cortado no se puede ampliar: se regeneran desde el JSONL
+            if resume and table_sinks and os.path.exists(results_sink.filename):
+                for record in iter_jsonl(results_sink.filename):
+                    for sink in table_sinks:
+                        sink.write(record)
+            
+            stack.enter_context(results_sink)
+            stack.enter_context(errors_sink)
+            # Una URL solo se marca como hecha cuando sus resultados ya están en disco
+            checkpoint.before_commit = lambda: (results_sink.flush(), errors_sink.flush())
+            
+            def on_result(record):
+                nonlocal with_website, unique_names
+                results_sink.write(record)
+                for sink in table_sinks:
+                    sink.write(record)
+                if not seen_names.add(record['name']):
+                    unique_names += 1
+                if record['website']:
+                    with_website += 1
+            
+            if use_async and listings:
+                print("--async does not support listing pages; using the pipeline")
+            
+            if use_async and not listings:
+                from async_scraper import scrape_stream_async
+                scrape_stream_async(urls, on_result, errors_sink.write, checkpoint.mark)
+            else:
+                pipeline = BatchPipeline(fetch_workers=workers, parse_processes=parse_workers,
+                                         listings=listings)
+                pipeline.run(urls, on_result, errors_sink.write, checkpoint.mark)
+        
+        total_results = results_sink.count
+        total_errors = errors_sink.count
         
         # Mostrar resumen
         print(f"\n*** BATCH COMPLETE! ***")
-        print(f"Successful: {len(results)}")
-        print(f"Errors: {len(errors)}")
-        print(f"Success rate: {len(results)/(len(results)+len(errors))*100:.1f}%")
+        print(f"Successful: {total_results}")
+        print(f"Errors: {total_errors}")
+        print(f"Success rate: {total_results/max(total_results+total_errors, 1)*100:.1f}%")
+        if deduplicator is not None and deduplicator.duplicates:
+            print(f"Duplicate URLs skipped: {deduplicator.duplicates}")
+        if checkpoint.skipped:
+            print(f"Already done in previous runs: {checkpoint.skipped}")
         
         # QA básico
-        if results:
+        if total_results:
             print(f"\n*** QUALITY CHECK ***")
-            unique_names = len(set(r['name'] for r in results))
-            print(f"- Unique companies: {unique_names}/{len(results)}")
-            
-            with_website = len([r for r in results if r['website']])
-            print(f"- With website: {with_website}/{len(results)} ({with_website/len(results)*100:.1f}%)")
+            print(f"- Unique companies: ~{unique_names}/{total_results}")
+            print(f"- With website: {with_website}/{total_results} ({with_website/total_results*100:.1f}%)")
         
         print(f"\nResults saved:")
-        print(f"  Success: {results_file}")
-        print(f"  Errors: {errors_file}")
+        print(f"  Success: {results_sink.filename}")
+        print(f"  Errors: {errors_sink.filename}")
+        for sink in table_sinks:
+            print(f"  {sink.format_name}: {sink.filename}")
         
-        return len(results) > 0
+        return total_results > 0
         
     except Exception as e:
         print(f"Batch failed: {e}")
         return False
 
+def reextract_export(archive_dir=None, source=None, workers=None, formats=None):
+    """Regenera un export re-extrayendo las páginas archivadas, sin red"""
+    archive_dir = archive_dir or ARCHIVE_CONFIG['dir']
+    if formats is None:
+        formats = EXPORT_CONFIG['formats']
+    print(f"\n*** RE-EXTRACTING ARCHIVE ***")
+    print("=" * 50)
+    print(f"Archive: {archive_dir}")
+    print(f"Source: {source or 'all'}")
+    
+    try:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        results_file = f"exports/reextract_results_{timestamp}.jsonl"
+        errors_file = f"exports/reextract_errors_{timestamp}.jsonl"
+        
+        results_sink = JsonlSink(results_file)
+        errors_sink = JsonlSink(errors_file)
+        table_sinks = [table_sink(fmt, results_sink.filename) for fmt in formats]
+        
+        with ExitStack() as stack:
+            for sink in [results_sink, errors_sink] + table_sinks:
+                stack.enter_context(sink)
+            
+            def on_result(record):
+                for sink in [results_sink] + table_sinks:
+                    sink.write(record)
+            
+            counts = reextract_archive(archive_dir, on_result, errors_sink.write,
+                                       source=source, workers=workers)
+        
+        total = counts['results'] + counts['errors']
+        print(f"\n*** RE-EXTRACTION COMPLETE! ***")
+        print(f"Records: {counts['results']}")
+        print(f"Errors: {counts['errors']}")
+        print(f"Success rate: {counts['results']/max(total, 1)*100:.1f}%")
+        
+        print(f"\nResults saved:")
+        print(f"  Success: {results_sink.filename}")
+        print(f"  Errors: {errors_sink.filename}")
+        for sink in table_sinks:
+            print(f"  {sink.format_name}: {sink.filename}")
+        
+        return counts['results'] > 0
+        
+    except Exception as e:
+        print(f"Re-extraction failed: {e}")
+        return False
+
 def show_status():
     """Muestra el estado actual del scraper"""
     print(f"\n*** SCRAPER STATUS ***")
@@ -209,6 +354,15 @@ def show_status():
         if key != 'error_types':
             print(f"  - {key.replace('_', ' ').title()}: {value}")
     
+    if selector_stats is not None:
+        print(f"\nSelector Hits:")
+        for source, fields in selector_stats.report(scraper.extractors.values()).items():
+            print(f"  {source}:")
+            for field, counts in fields.items():
+                print(f"    - {field}: " + ", ".join(
+                    f"{selector} ({hits}/{attempts})" for selector, (hits, attempts) in counts.items()
+                ))
+    
     print(f"\nCourtesy Hours Check:")
     is_courtesy = rate_limiter.is_courtesy_hours()
     print(f"  - Current status: {'Active hours' if is_courtesy else 'Off hours'}")
@@ -249,23 +403,52 @@ Ejemplos de uso:
   python main.py test                 # Prueba el scraper
   python main.py single <URL>         # Scrapea una URL
   python main.py batch <file>         # Scrapea URLs desde archivo
+  python main.py batch <file> --async # Batch con motor asíncrono (varios hosts a la vez)
+  python main.py batch <file> --workers 4  # Batch con pool de hilos
+  python main.py batch <file> --parse-workers 4  # Parseo en procesos aparte
+  python main.py batch <file> --stream  # Corta cada descarga en cuanto hay datos suficientes
+  python main.py batch <file> --listings  # URLs de listados: varios registros por página
+  python main.py batch seeds.txt.gz   # Entrada comprimida (o '-' para leer de stdin)
+  python main.py batch --resume <id>  # Reanuda un batch interrumpido
+  python main.py batch <file> --formats parquet,csv  # Exporta también a Parquet/CSV por bloques
+  python main.py reextract [archive] --source crunchbase  # Re-extrae páginas archivadas (sin red)
   python main.py status               # Muestra estado actual
   python main.py sample               # Crea archivo de ejemplo
         """
     )
     
-    parser.add_argument('command', choices=['test', 'single', 'batch', 'status', 'sample'],
+    parser.add_argument('command', choices=['test', 'single', 'batch', 'reextract', 'status', 'sample'],
                        help='Command to execute')
-    parser.add_argument('url_or_file', nargs='?', help='URL for single or file for batch')
+    parser.add_argument('url_or_file', nargs='?', help='URL for single, file for batch or archive directory for reextract')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                       help='Use the asyncio engine for batch (requires aiohttp)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Fetch threads for batch (default: 1, sequential) '
+                            'or processes for reextract (default: all cores)')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                       help='Processes for HTML parsing in batch (default: 0, parse inline)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Stream page bodies and stop downloading once the required fields are found')
+    parser.add_argument('--listings', action='store_true',
+                       help='Treat batch URLs as listing pages (search results, leaderboards) with many records each')
+    parser.add_argument('--resume', metavar='BATCH_ID',
+                       help='Resume an interrupted batch, skipping the URLs it already completed')
+    parser.add_argument('--formats', metavar='FORMATS',
+                       help='Also write batch/reextract results as these comma-separated formats: parquet, csv')
+    parser.add_argument('--source', help='Only re-extract pages from this source (e.g. crunchbase)')
     parser.add_argument('--version', action='version', version=f'{PROJECT_NAME} {VERSION}')
     
     args = parser.parse_args()
     
     # Setup inicial
     setup_directories()
+    if args.stream:
+        STREAMING_CONFIG['enabled'] = True
     print(f"{PROJECT_NAME} v{VERSION}")
     print("=" * 50)
     
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()] if args.formats else None
+    
     # Ejecutar comando
     if args.command == 'test':
         return test_scraper()
@@ -279,13 +462,19 @@ Ejemplos de uso:
         return scrape_single(args.url_or_file)
     
     elif args.command == 'batch':
-        if not args.url_or_file:
+        if not args.url_or_file and not args.resume:
             print("Please provide a file with URLs")
             print("Usage: python main.py batch <file>")
             print("Tip: Run 'python main.py sample' to create an example file")
             return False
         
-        return scrape_batch(args.url_or_file)
+        return scrape_batch(args.url_or_file, use_async=args.use_async, workers=args.workers or 1,
+                            parse_workers=args.parse_workers, listings=args.listings,
+                            resume=args.resume, formats=formats)
+    
+    elif args.command == 'reextract':
+        return reextract_export(args.url_or_file, source=args.source, workers=args.workers,
+                                formats=formats)
     
     elif args.command == 'status':
         show_status()
@@ -309,4 +498,8 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\nFatal error: {e}")
         logger.exception("Fatal error in main")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        # Lo aprendido sobre los selectores se conserva aunque la ejecución falle
+        if selector_stats is not None:
+            selector_stats.save()
\ No newline at end of file
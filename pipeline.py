@@ -0,0 +1,351 @@
+"""
+Pipeline por etapas para batches: frontier → fetch → parse → validate → sink
+"""
+
+import time
+import queue
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from config import PIPELINE_CONFIG
+from rate_limiter import host_scheduler
+from selector_stats import selector_stats
+from canonical_url import CanonicalURL
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de stream entre etapas
+DONE = object()
+
+# Cada cuánto se revisa la parada mientras se espera en una cola
+POLL_INTERVAL = 0.5
+
+
+def put(out_queue, item, stop):
+    """put bloqueante que se abandona si se pide parar (devuelve False)"""
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def get(in_queue, stop):
+    """get bloqueante; devuelve DONE si se pide parar"""
+    while not stop.is_set():
+        try:
+            return in_queue.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    return DONE
+
+
+class Stage:
+    """Etapa del pipeline: N hilos que leen de una cola acotada y escriben en la siguiente
+
+    Un error inesperado en ``func`` se registra y se descarta el elemento,
+    salvo con ``fatal``: entonces se guarda en ``failure``, se activa
+    ``stop`` y todo el pipeline se detiene (p. ej. el sink si falla el disco
+    o el checkpoint).
+    """
+
+    def __init__(self, name, func, workers, in_queue, out_queue, next_stage=None,
+                 stop=None, fatal=False):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.next_stage = next_stage
+        self.processed = 0
+        self.active = self.workers
+        self.lock = threading.Lock()
+        self.threads = []
+        self.stop = stop if stop is not None else threading.Event()
+        self.fatal = fatal
+        self.failure = None
+
+    def start(self):
+        """Arranca los hilos de la etapa"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.loop, name=f"{self.name}-{i}")
+            thread.start()
+            self.threads.append(thread)
+
+    def loop(self):
+        """Bucle de un hilo: consume hasta recibir DONE o hasta que se pida parar"""
+        while True:
+            item = get(self.in_queue, self.stop)
+            if item is DONE:
+                break
+
+            # func devuelve el elemento para la siguiente etapa (o None si no hay)
+            try:
+                output = self.func(item)
+            except Exception as e:
+                if self.fatal:
+                    logger.exception(f"Fatal error in pipeline stage {self.name}; stopping pipeline")
+                    with self.lock:
+                        if self.failure is None:
+                            self.failure = e
+                    self.stop.set()
+                    break
+                logger.exception(f"Unexpected error in pipeline stage {self.name}")
+                output = None
+            with self.lock:
+                self.processed += 1
+            if output is not None and self.out_queue is not None:
+                put(self.out_queue, output, self.stop)  # Bloquea si la siguiente etapa va lenta
+
+        # El último hilo en terminar propaga el fin a la siguiente etapa
+        with self.lock:
+            self.active -= 1
+            last = self.active == 0
+        if last and self.next_stage is not None:
+            for _ in range(self.next_stage.workers):
+                put(self.out_queue, DONE, self.stop)
+
+    def join(self):
+        """Espera a que terminen todos los hilos de la etapa"""
+        for thread in self.threads:
+            thread.join()
+
+
+class BatchPipeline:
+    """Batch como etapas explícitas conectadas por colas acotadas
+
+    - frontier: lee las URLs (iterable, incluso un generador) por ventanas,
+      las canonicaliza (``CanonicalURL``) y las intercala por host
+    - fetch: descarga el cuerpo crudo (``Scraper.fetch_url``)
+    - parse: parsea y extrae (en hilos o en un ``ProcessPoolExecutor``); con
+      ``listings`` cada URL es una página de listado que da varios registros
+    - validate: ``DataExtractor.validate_data``
+    - sink: un único hilo que entrega resultados y errores a los callbacks
+
+    Cada cola tiene ``queue_size`` elementos como máximo: si una etapa va
+    lenta, las anteriores se bloquean en ``put`` (backpressure) y la memoria
+    no crece con el número de URLs.
+    """
+
+    def __init__(self, scraper=None, fetch_workers=None, parse_workers=None,
+                 validate_workers=None, parse_processes=0, queue_size=None,
+                 frontier_window=None, report_interval=None, listings=False):
+        if scraper is None:
+            from scraper import scraper
+        self.scraper = scraper
+        self.fetch_workers = fetch_workers or PIPELINE_CONFIG['fetch_workers']
+        self.parse_processes = parse_processes
+        # Con procesos, un hilo por proceso mantiene el pool ocupado
+        self.parse_workers = parse_processes or parse_workers or PIPELINE_CONFIG['parse_workers']
+        self.validate_workers = validate_workers or PIPELINE_CONFIG['validate_workers']
+        self.queue_size = queue_size or PIPELINE_CONFIG['queue_size']
+        self.frontier_window = frontier_window or PIPELINE_CONFIG['frontier_window']
+        self.report_interval = report_interval or PIPELINE_CONFIG['report_interval']
+        self.listings = listings
+
+        self.parse_pool = None
+        self.stages = []
+        self.stop = threading.Event()
+        self.input_failure = None
+        self.frontier_count = 0
+        self.counts = {'results': 0, 'errors': 0, 'invalid': 0}
+
+    def error(self, url, error):
+        """Elemento de error para la etapa sink"""
+        logger.error(f"Failed to scrape {url}: {error}")
+        return ('error', {
+            'url': url,
+            'error': str(error),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def fetch(self, url):
+        """Etapa fetch: URL → cuerpo crudo"""
+        try:
+            # Un listado se descarga entero aunque esté activo el streaming
+            streaming = False if self.listings else None
+            return ('page', url, self.scraper.fetch_url(url, streaming=streaming))
+        except Exception as e:
+            return self.error(url, e)
+
+    def parse(self, item):
+        """Etapa parse: cuerpo crudo → registros (uno, o los de un listado)"""
+        if item[0] != 'page':
+            return item
+        _, url, content = item
+        try:
+            if self.parse_pool is not None:
+                from scraper import extract_with_stats, extract_listing_with_stats
+                if self.listings:
+                    records, stats_delta = self.parse_pool.submit(
+                        extract_listing_with_stats, content, url, validate=False
+                    ).result()
+                else:
+                    data, stats_delta = self.parse_pool.submit(
+                        extract_with_stats, content, url, validate=False
+                    ).result()
+                    records = [data]
+                if selector_stats is not None:
+                    selector_stats.merge(stats_delta)
+            elif self.listings:
+                records = self.scraper.extract_listing(content, url, validate=False)
+            else:
+                records = [self.scraper.extract(content, url, validate=False)]
+        except Exception as e:
+            return self.error(url, e)
+        return ('records', url, records)
+
+    def validate(self, item):
+        """Etapa validate: marca cada registro como válido o no"""
+        if item[0] != 'records':
+            return item
+        _, url, records = item
+        extractor = self.scraper.get_extractor_for_url(url)
+        results = []
+        for data in records:
+            is_valid, message = extractor.validate_data(data)
+            if not is_valid:
+                logger.warning(f"Data validation failed: {message}")
+            results.append((data, is_valid))
+        return ('results', url, results)
+
+    def make_sink(self, on_result, on_error, on_url_done=None):
+        """Etapa sink: entrega cada elemento a su callback
+        
+        ``on_url_done(url, ok)`` se llama después de entregar todo lo de una
+        URL (p. ej. para marcarla en el checkpoint).
+        """
+        def sink(item):
+            if item[0] == 'results':
+                _, url, results = item
+                for data, is_valid in results:
+                    self.counts['results'] += 1
+                    if not is_valid:
+                        self.counts['invalid'] += 1
+                    self.scraper.record_extracted(data)
+                    on_result(data)
+                ok = True
+            else:
+                self.counts['errors'] += 1
+                url = item[1]['url']
+                on_error(item[1])
+                ok = False
+            if on_url_done is not None:
+                on_url_done(url, ok)
+        return sink
+
+    def feed(self, urls, out_queue, fetch_stage):
+        """Etapa frontier: ventanas de URLs intercaladas por host"""
+        window = []
+
+        def flush():
+            for url in host_scheduler.iter_ready(window):
+                if not put(out_queue, url, self.stop):
+                    break
+                self.frontier_count += 1
+            window.clear()
+
+        try:
+            for url in urls:
+                if self.stop.is_set():
+                    break
+                window.append(CanonicalURL(url))
+                if len(window) >= self.frontier_window:
+                    flush()
+            flush()
+        except Exception as e:
+            # Se terminan las URLs ya leídas, pero el batch acaba fallando
+            logger.exception("Error reading batch input; finishing with URLs read so far")
+            self.input_failure = e
+        finally:
+            for _ in range(fetch_stage.workers):
+                put(out_queue, DONE, self.stop)
+
+    def queue_depths(self):
+        """Profundidad actual de cada cola de entrada"""
+        return {stage.name: stage.in_queue.qsize() for stage in self.stages}
+
+    def stats(self):
+        """Estado de cada etapa: hilos, elementos procesados y cola pendiente"""
+        return {
+            'frontier': {'queued': self.frontier_count},
+            **{
+                stage.name: {
+                    'workers': stage.workers,
+                    'processed': stage.processed,
+                    'queue_depth': stage.in_queue.qsize()
+                }
+                for stage in self.stages
+            }
+        }
+
+    def run(self, urls, on_result, on_error, on_url_done=None):
+        """Ejecuta el pipeline completo; los callbacks se llaman desde un único hilo
+
+        Si falla un callback del sink (escritura o checkpoint) o la lectura de
+        la entrada, se lanza esa excepción al terminar. Ante cualquier salida
+        (también Ctrl-C) se esperan el frontier y todas las etapas antes de
+        volver, así que el llamador puede cerrar sinks y checkpoint después.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(4)]
+        self.stop = threading.Event()
+        self.input_failure = None
+        stop = self.stop
+
+        sink = Stage('sink', self.make_sink(on_result, on_error, on_url_done), 1, queues[3], None,
+                     stop=stop, fatal=True)
+        validate = Stage('validate', self.validate, self.validate_workers, queues[2], queues[3], sink,
+                         stop=stop)
+        parse = Stage('parse', self.parse, self.parse_workers, queues[1], queues[2], validate,
+                      stop=stop)
+        fetch = Stage('fetch', self.fetch, self.fetch_workers, queues[0], queues[1], parse,
+                      stop=stop)
+        self.stages = [fetch, parse, validate, sink]
+
+        logger.info(
+            f"Starting pipeline: fetch={fetch.workers} parse={parse.workers}"
+            f"{f' ({self.parse_processes} processes)' if self.parse_processes else ''}"
+            f" validate={validate.workers} queue_size={self.queue_size}"
+        )
+
+        if self.parse_processes:
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+
+        frontier = threading.Thread(target=self.feed, args=(urls, queues[0], fetch), name='frontier')
+        try:
+            for stage in self.stages:
+                stage.start()
+            frontier.start()
+
+            # Reporte periódico de colas mientras el sink no haya terminado
+            last_report = time.monotonic()
+            while any(thread.is_alive() for thread in sink.threads):
+                sink.threads[0].join(timeout=1)
+                if time.monotonic() - last_report >= self.report_interval:
+                    logger.info(f"Pipeline status: {self.stats()} | {self.counts}")
+                    last_report = time.monotonic()
+        finally:
+            # Si el sink sigue vivo (Ctrl-C) se pide parar; en cualquier caso
+            # se espera a todos los hilos antes de devolver el control
+            if any(thread.is_alive() for thread in sink.threads):
+                logger.warning("Pipeline interrupted; stopping stages")
+                stop.set()
+            if frontier.ident is not None:
+                frontier.join()
+            for stage in self.stages:
+                stage.join()
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+
+        if sink.failure is not None:
+            raise sink.failure
+        if self.input_failure is not None:
+            raise self.input_failure
+
+        logger.info(f"Pipeline complete: {self.counts}")
+        return dict(self.counts)
@@ -4,10 +4,14 @@ Rate Limiter para controlar la velocidad de requests
 
 import time
 import random
-from collections import deque
+import threading
+from collections import deque, OrderedDict
 from datetime import datetime, timedelta
 import logging
 
+from config import RATE_LIMIT_CONFIG
+from canonical_url import url_parts
+
 logger = logging.getLogger(__name__)
 
 class RateLimiter:
@@ -17,30 +21,45 @@ class RateLimiter:
         self.base_delay = base_delay    # segundos mínimos entre requests
         self.requests = deque()
         self.last_request_time = 0
+        self.next_allowed_time = 0      # reloj monotónico
+        self.lock = threading.Lock()
         
     def wait_if_needed(self):
-        """Espera si es necesario según el rate limiting"""
-        now = time.time()
-        
-        # Remover requests fuera del ventana de tiempo
-        while self.requests and now - self.requests[0] > self.time_window:
-            self.requests.popleft()
+        """Espera si es necesario según el rate limiting
         
-        # Verificar si hemos llegado al límite
-        if len(self.requests) >= self.max_requests:
-            # Calcular tiempo de espera hasta el primer request de la ventana
-            sleep_time = self.time_window - (now - self.requests[0])
-            if sleep_time > 0:
-                logger.info(f"Rate limit reached. Waiting {sleep_time:.1f} seconds...")
-                time.sleep(sleep_time)
+        Calcula el instante más temprano en que se puede enviar el siguiente
+        request y duerme solo lo que falte: el tiempo gastado en parsear y
+        exportar la página anterior ya cuenta como parte del intervalo. La
+        reserva del hueco se hace bajo lock, así que varios hilos reciben
+        turnos distintos en vez de colarse a la vez.
+        """
+        with self.lock:
+            now = time.monotonic()
+            
+            # Remover requests fuera del ventana de tiempo
+            while self.requests and now - self.requests[0] > self.time_window:
+                self.requests.popleft()
+            
+            # Intervalo de cortesía (con jitter) desde el último request
+            earliest = max(now, self.next_allowed_time)
+            
+            # Verificar si hemos llegado al límite
+            if len(self.requests) >= self.max_requests:
+                window_free_at = self.requests[-self.max_requests] + self.time_window
+                if window_free_at > earliest:
+                    logger.info(f"Rate limit reached. Waiting {window_free_at - now:.1f} seconds...")
+                    earliest = window_free_at
+            
+            # Reservar el turno con su hora de envío
+            self.requests.append(earliest)
+            self.last_request_time = earliest
+            
+            # Delay aleatorio para parecer humano, aplicado al siguiente request
+            self.next_allowed_time = earliest + self.base_delay + random.uniform(0.5, 1.5)
         
-        # Delay aleatorio para parecer humano
-        delay = self.base_delay + random.uniform(0.5, 1.5)
-        time.sleep(delay)
-        
-        # Agregar request actual
-        self.requests.append(now)
-        self.last_request_time = now
+        sleep_time = earliest - time.monotonic()
+        if sleep_time > 0:
+            time.sleep(sleep_time)
         
         logger.debug(f"Request allowed at {datetime.now().strftime('%H:%M:%S')}")
     
@@ -48,7 +67,7 @@ class RateLimiter:
         """Obtiene tiempo transcurrido desde el último request"""
         if self.last_request_time == 0:
             return float('inf')
-        return time.time() - self.last_request_time
+        return time.monotonic() - self.last_request_time
     
     def is_courtesy_hours(self):
         """Verifica si estamos en horarios de cortesía (8AM - 6PM GMT)"""
@@ -83,6 +102,141 @@ class RateLimiter:
         return True
 
 
+class TokenBucket:
+    """Token bucket de un host: ``rate`` tokens por segundo, hasta ``capacity``"""
+    
+    def __init__(self, rate, capacity=1, jitter=(0, 0)):
+        self.rate = rate
+        self.capacity = capacity
+        self.jitter = jitter
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    def refill(self, now):
+        """Recarga tokens según el tiempo transcurrido"""
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+    
+    def available_at(self):
+        """Instante (reloj monotónico) en que habrá un token disponible"""
+        now = time.monotonic()
+        self.refill(now)
+        if self.tokens >= 1:
+            return now
+        return now + (1 - self.tokens) / self.rate
+    
+    def reserve(self):
+        """Reserva un token y devuelve cuántos segundos hay que esperar para usarlo
+        
+        No duerme: el llamador decide cómo esperar (``time.sleep`` o
+        ``asyncio.sleep``). El saldo puede quedar negativo, lo que encola
+        las reservas siguientes detrás de esta.
+        """
+        now = time.monotonic()
+        self.refill(now)
+        wait = 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        
+        # Jitter para no enviar requests a intervalos exactos. Se carga al
+        # saldo en vez de dormirlo ahora: retrasa el siguiente request solo
+        # si el tiempo de parseo/exportación no lo ha cubierto ya.
+        if self.jitter[1] > 0:
+            self.tokens -= random.uniform(*self.jitter) * self.rate
+        return wait
+    
+    def set_rate(self, rate):
+        """Cambia la tasa conservando el saldo actual"""
+        self.refill(time.monotonic())
+        self.rate = rate
+
+
+class HostScheduler:
+    """Planificador de cortesía con un token bucket por host
+    
+    Cada host tiene su propio presupuesto, derivado de
+    ``RATE_LIMIT_CONFIG`` y del ``Crawl-delay`` de su robots.txt, de modo que
+    un host lento no bloquea a los demás.
+    """
+    
+    def __init__(self, base_delay=None, max_requests_per_minute=None, jitter=None):
+        self.base_delay = base_delay if base_delay is not None else RATE_LIMIT_CONFIG['DELAY_BETWEEN_REQUESTS']
+        self.max_requests_per_minute = max_requests_per_minute or RATE_LIMIT_CONFIG['MAX_REQUESTS_PER_MINUTE']
+        self.jitter = jitter if jitter is not None else RATE_LIMIT_CONFIG['JITTER_RANGE']
+        self.buckets = {}
+        self.crawl_delays = {}
+        self.lock = threading.RLock()
+    
+    @staticmethod
+    def host_for(url):
+        """Host (netloc en minúsculas) de una URL"""
+        return url_parts(url).netloc.lower()
+    
+    def interval_for(self, host):
+        """Intervalo mínimo entre requests a un host"""
+        return max(
+            self.base_delay,
+            self.crawl_delays.get(host) or 0,
+            60 / self.max_requests_per_minute
+        )
+    
+    def bucket_for(self, host):
+        """Obtiene (o crea) el bucket de un host"""
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(rate=1 / self.interval_for(host), jitter=self.jitter)
+                self.buckets[host] = bucket
+            return bucket
+    
+    def set_crawl_delay(self, host, crawl_delay):
+        """Ajusta el bucket de un host al Crawl-delay de su robots.txt"""
+        if not crawl_delay or self.crawl_delays.get(host) == crawl_delay:
+            return
+        with self.lock:
+            self.crawl_delays[host] = crawl_delay
+            self.bucket_for(host).set_rate(1 / self.interval_for(host))
+        logger.info(f"Crawl-delay for {host}: {self.interval_for(host):.1f}s between requests")
+    
+    def reserve(self, host, crawl_delay=None):
+        """Consume un token del host y devuelve los segundos a esperar (sin dormir)"""
+        self.set_crawl_delay(host, crawl_delay)
+        with self.lock:
+            return self.bucket_for(host).reserve()
+    
+    def wait(self, host, crawl_delay=None):
+        """Bloquea hasta que el host tenga capacidad y consume un token"""
+        delay = self.reserve(host, crawl_delay)
+        if delay > 0:
+            logger.debug(f"Waiting {delay:.2f}s for {host}")
+            time.sleep(delay)
+    
+    def iter_ready(self, urls, key=None):
+        """Reordena URLs entregando siempre la del host que antes tenga capacidad
+        
+        No consume tokens (eso lo hace ``wait`` al enviar), solo decide el
+        orden: así una batch mezclada tarda aproximadamente lo que el host
+        más lento y no la suma de todos. ``key`` extrae la URL si los
+        elementos no son URLs directamente (p. ej. pares ``(índice, url)``).
+        """
+        pending = OrderedDict()
+        for item in urls:
+            url = key(item) if key else item
+            pending.setdefault(self.host_for(url), deque()).append(item)
+        
+        while pending:
+            with self.lock:
+                host = min(pending, key=lambda h: self.bucket_for(h).available_at())
+            queue = pending[host]
+            yield queue.popleft()
+            if not queue:
+                del pending[host]
+            else:
+                # Rotar para que los empates se repartan entre hosts
+                pending.move_to_end(host)
+
+
 class ScrapingMetrics:
     """Métricas para monitoreo del scraping"""
     
@@ -95,20 +249,46 @@ class ScrapingMetrics:
         self.error_types = {}
         self.current_page = 0
         self.records_extracted = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_bytes_saved = 0
+        self.lock = threading.Lock()
         
     def update_request(self, success=True, error_type=None, rate_limited=False):
         """Actualiza métricas de request"""
-        self.total_requests += 1
-        
-        if success:
-            self.successful_requests += 1
-        else:
-            self.failed_requests += 1
-            if error_type:
-                self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
-        
-        if rate_limited:
-            self.rate_limit_hits += 1
+        with self.lock:
+            self.total_requests += 1
+            
+            if success:
+                self.successful_requests += 1
+            else:
+                self.failed_requests += 1
+                if error_type:
+                    self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+            
+            if rate_limited:
+                self.rate_limit_hits += 1
+    
+    def update_cache(self, hit, bytes_saved=0):
+        """Actualiza métricas de la caché HTTP (hit = 304 servido desde disco)"""
+        with self.lock:
+            if hit:
+                self.cache_hits += 1
+                self.cache_bytes_saved += bytes_saved
+            else:
+                self.cache_misses += 1
+    
+    def get_cache_hit_rate(self):
+        """Porcentaje de páginas servidas desde la caché HTTP"""
+        lookups = self.cache_hits + self.cache_misses
+        if lookups == 0:
+            return 0
+        return (self.cache_hits / lookups) * 100
+    
+    def add_records(self, count=1):
+        """Suma registros extraídos"""
+        with self.lock:
+            self.records_extracted += count
     
     def get_success_rate(self):
         """Calcula tasa de éxito"""
@@ -133,6 +313,9 @@ class ScrapingMetrics:
         rpm = self.get_requests_per_minute()
         elapsed = self.get_elapsed_time()
         
+        with self.lock:
+            error_types = dict(self.error_types)
+        
         return {
             'total_requests': self.total_requests,
             'successful_requests': self.successful_requests,
@@ -142,7 +325,10 @@ class ScrapingMetrics:
             'rate_limit_hits': self.rate_limit_hits,
             'elapsed_minutes': f"{elapsed:.1f}",
             'records_extracted': self.records_extracted,
-            'error_types': self.error_types
+            'cache_hits': self.cache_hits,
+            'cache_hit_rate': f"{self.get_cache_hit_rate():.1f}%",
+            'cache_bytes_saved': self.cache_bytes_saved,
+            'error_types': error_types
         }
     
     def log_status(self):
@@ -154,6 +340,9 @@ class ScrapingMetrics:
 # Instancia global de métricas
 metrics = ScrapingMetrics()
 
+# Planificador global por host
+host_scheduler = HostScheduler()
+
 # Instancia global de rate limiter
 rate_limiter = RateLimiter(
     max_requests=30,
@@ -0,0 +1,109 @@
+"""
+Re-extracción offline sobre el archivo de HTML crudo (sin red)
+"""
+
+import os
+import logging
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from archive import PageArchive
+from selector_stats import selector_stats
+
+logger = logging.getLogger(__name__)
+
+# Páginas por tarea enviada a un proceso (amortiza el coste de IPC)
+CHUNK_SIZE = 200
+
+# Archivo abierto por cada proceso worker
+_worker_archives = {}
+
+
+def extract_archived(root, chunk):
+    """Lee y extrae un lote de páginas archivadas (se ejecuta en un proceso worker)
+
+    Devuelve (lista de (ok, registro o error) en el orden del lote, delta
+    de aciertos de selectores del worker).
+    """
+    from scraper import extract_record
+
+    archive = _worker_archives.get(root)
+    if archive is None:
+        archive = PageArchive(root=root)
+        _worker_archives[root] = archive
+
+    outcomes = []
+    for url, fetched_at, segment, offset, length, dict_id in chunk:
+        try:
+            content = archive.read_blob(segment, offset, length, dict_id)
+            data = extract_record(content, url)
+            # El dato se observó al descargar la página, no al re-extraerla
+            data['scraped_at'] = datetime.utcfromtimestamp(fetched_at).isoformat() + 'Z'
+            outcomes.append((True, data))
+        except Exception as e:
+            outcomes.append((False, {
+                'url': url,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }))
+    return outcomes, selector_stats.take_delta() if selector_stats is not None else {}
+
+
+def iter_chunks(archive, source=None, chunk_size=CHUNK_SIZE):
+    """Agrupa las entradas del índice en lotes para los workers"""
+    chunk = []
+    for url, _, fetched_at, segment, offset, length, dict_id in archive.iter_latest(source):
+        chunk.append((url, fetched_at, segment, offset, length, dict_id))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reextract_archive(root, on_result, on_error, source=None, workers=None):
+    """Re-ejecuta los extractores actuales sobre la última versión de cada URL archivada
+
+    Los lotes se reparten entre ``workers`` procesos (por defecto, uno por
+    núcleo) con un número acotado de tareas en vuelo, de modo que la memoria
+    no depende del tamaño del archivo. ``on_result``/``on_error`` se llaman
+    desde el hilo principal. Devuelve los contadores de resultados y errores.
+    """
+    if not os.path.exists(os.path.join(root, 'index.sqlite')):
+        raise FileNotFoundError(f"No archive index found in {root}")
+
+    archive = PageArchive(root=root)
+    workers = workers or os.cpu_count() or 1
+    counts = {'results': 0, 'errors': 0}
+
+    def collect(future):
+        outcomes, stats_delta = future.result()
+        if selector_stats is not None:
+            selector_stats.merge(stats_delta)
+        for ok, payload in outcomes:
+            if ok:
+                counts['results'] += 1
+                on_result(payload)
+            else:
+                counts['errors'] += 1
+                on_error(payload)
+
+    logger.info(f"Re-extracting {root} (source={source or 'all'}) with {workers} processes")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk in iter_chunks(archive, source):
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+                pending.add(pool.submit(extract_archived, root, chunk))
+
+            for future in pending:
+                collect(future)
+    finally:
+        archive.close()
+
+    logger.info(f"Re-extraction complete: {counts}")
+    return counts
@@ -5,184 +5,354 @@ Validación de robots.txt y términos de servicio
 import requests
 import time
 import re
+import os
+import json
+import tempfile
+import threading
+from email.utils import parsedate_to_datetime
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import logging
 
+from config import ROBOTS_CHECK, RATE_LIMIT_CONFIG
+from robots_rules import parse_robots
+from canonical_url import url_parts
+from rate_limiter import host_scheduler
+
 logger = logging.getLogger(__name__)
 
+
+class RobotsCache:
+    """Caché persistente por esquema+host compartida entre ejecuciones y procesos
+
+    Cada host se guarda como un JSON independiente en ``cache_dir``. Las
+    escrituras son atómicas (fichero temporal + ``os.replace``), así que
+    varios procesos ``main.py batch`` pueden leer y escribir a la vez sin
+    ver nunca un fichero a medias; en el peor caso dos procesos descargan
+    el mismo robots.txt y gana la última escritura.
+    """
+    
+    def __init__(self, cache_dir=None, default_ttl=None, min_ttl=None, prefix='robots'):
+        self.cache_dir = cache_dir or ROBOTS_CHECK['cache_dir']
+        self.default_ttl = default_ttl if default_ttl is not None else ROBOTS_CHECK['cache_ttl']
+        self.min_ttl = min_ttl if min_ttl is not None else ROBOTS_CHECK['min_cache_ttl']
+        self.prefix = prefix
+        self.memory = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def path_for(self, base_url):
+        """Ruta del fichero de caché para un esquema+host"""
+        parsed = urlparse(base_url)
+        key = re.sub(r'[^A-Za-z0-9._-]', '_', f"{parsed.scheme}_{parsed.netloc.lower()}")
+        return os.path.join(self.cache_dir, f"{self.prefix}_{key}.json")
+    
+    def peek(self, base_url):
+        """Devuelve la entrada guardada aunque haya expirado (o None)"""
+        with self.lock:
+            entry = self.memory.get(base_url)
+        if entry is not None:
+            return entry
+        
+        try:
+            with open(self.path_for(base_url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        with self.lock:
+            self.memory[base_url] = entry
+        return entry
+    
+    def get(self, base_url):
+        """Devuelve la entrada si sigue vigente, o None si falta o expiró"""
+        entry = self.peek(base_url)
+        if entry is not None and entry.get('expires_at', 0) > time.time():
+            return entry
+        
+        # Otro proceso puede haberla renovado en disco mientras tanto
+        with self.lock:
+            self.memory.pop(base_url, None)
+        entry = self.peek(base_url)
+        if entry is not None and entry.get('expires_at', 0) > time.time():
+            return entry
+        return None
+    
+    def set(self, base_url, entry, ttl=None):
+        """Guarda una entrada con su expiración de forma atómica"""
+        now = time.time()
+        entry = dict(entry)
+        entry['fetched_at'] = now
+        entry['expires_at'] = now + (ttl if ttl is not None else self.default_ttl)
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp_', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path_for(base_url))
+        except OSError as e:
+            logger.warning(f"Could not persist cache entry for {base_url}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        
+        with self.lock:
+            self.memory[base_url] = entry
+        return entry
+    
+    def ttl_from_headers(self, headers):
+        """Calcula el TTL a partir de Cache-Control / Expires, acotado a [min_ttl, default_ttl]"""
+        ttl = None
+        cache_control = (headers.get('Cache-Control') or '').lower()
+        directives = [d.strip() for d in cache_control.split(',') if d.strip()]
+        
+        if 'no-store' in directives or 'no-cache' in directives:
+            ttl = 0
+        else:
+            for directive in directives:
+                if directive.startswith(('s-maxage=', 'max-age=')):
+                    try:
+                        ttl = int(directive.split('=', 1)[1].strip('"'))
+                    except ValueError:
+                        continue
+                    if directive.startswith('s-maxage='):
+                        break
+        
+        if ttl is None and headers.get('Expires'):
+            try:
+                expires = parsedate_to_datetime(headers['Expires'])
+                date = parsedate_to_datetime(headers['Date']) if headers.get('Date') else None
+                reference = date.timestamp() if date else time.time()
+                ttl = expires.timestamp() - reference
+            except (TypeError, ValueError, IndexError):
+                ttl = 0  # Expires inválido equivale a "ya expirado"
+        
+        if ttl is None:
+            return self.default_ttl
+        return max(self.min_ttl, min(ttl, self.default_ttl))
+
+
 class RobotsChecker:
     """Validador de robots.txt y ToS"""
     
-    def __init__(self, user_agent="founders25-research/1.0"):
+    def __init__(self, user_agent="founders25-research/1.0", cache=None, tos_cache=None):
         self.user_agent = user_agent
-        self.cache = {}
+        self.cache = cache or RobotsCache()
+        self.host_locks = {}
+        self.host_locks_guard = threading.Lock()
+        # Sesión HTTP para sondear portadas (el scraper instala la suya, con la caché HTTP)
+        self.session_provider = None
+        self.local = threading.local()
+        self.tos_cache = tos_cache or RobotsCache(
+            cache_dir=self.cache.cache_dir,
+            default_ttl=ROBOTS_CHECK['tos_cache_ttl'],
+            prefix='tos'
+        )
     
-    def check_robots_txt(self, url):
-        """Verifica robots.txt para una URL específica"""
-        parsed_url = urlparse(url)
-        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    @property
+    def session(self):
+        """Sesión HTTP del hilo actual para las peticiones de página (sondeo de ToS)"""
+        if self.session_provider is not None:
+            return self.session_provider()
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self.local.session = session
+        return session
+    
+    def lock_for(self, base_url):
+        """Lock por host para que varios hilos no descarguen el mismo robots.txt"""
+        with self.host_locks_guard:
+            lock = self.host_locks.get(base_url)
+            if lock is None:
+                lock = threading.Lock()
+                self.host_locks[base_url] = lock
+            return lock
+    
+    def fetch_robots_txt(self, base_url):
+        """Obtiene robots.txt de un host, usando la caché persistente si está vigente"""
+        entry = self.cache.get(base_url)
+        if entry is not None:
+            return entry, True
+        
+        with self.lock_for(base_url):
+            # Otro hilo pudo descargarlo mientras esperábamos el lock
+            entry = self.cache.get(base_url)
+            if entry is not None:
+                return entry, True
+            return self.download_robots_txt(base_url)
+    
+    def download_robots_txt(self, base_url):
+        """Descarga (o revalida) robots.txt y lo guarda en la caché"""
         robots_url = f"{base_url}/robots.txt"
+        stale = self.cache.peek(base_url)
+        headers = {'User-Agent': self.user_agent}
+        
+        # Revalidar la copia expirada en vez de descargarla entera
+        if stale and stale.get('status_code') == 200:
+            if stale.get('etag'):
+                headers['If-None-Match'] = stale['etag']
+            if stale.get('last_modified'):
+                headers['If-Modified-Since'] = stale['last_modified']
         
         try:
             logger.info(f"Checking robots.txt: {robots_url}")
             
             response = requests.get(
                 robots_url,
-                timeout=10,
-                headers={'User-Agent': self.user_agent}
+                timeout=ROBOTS_CHECK['timeout'],
+                headers=headers
             )
             
-            if response.status_code == 200:
-                robots_content = response.text
-                is_allowed = self.is_url_allowed(robots_content, url, self.user_agent)
-                
-                return {
-                    'allowed': is_allowed,
-                    'robots_url': robots_url,
-                    'crawl_delay': self.get_crawl_delay(robots_content, self.user_agent),
-                    'disallow_paths': self.get_disallow_paths(robots_content, self.user_agent),
-                    'raw_content': robots_content
-                }
+            if response.status_code == 304 and stale:
+                logger.debug(f"robots.txt not modified: {robots_url}")
+                return self.cache.set(base_url, stale, self.cache.ttl_from_headers(response.headers)), False
+            
+            entry = {
+                'robots_url': robots_url,
+                'status_code': response.status_code,
+                'content': response.text if response.status_code == 200 else None,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            
+            # Los 5xx son transitorios: cachearlos poco tiempo
+            if response.status_code >= 500:
+                ttl = self.cache.min_ttl
             else:
-                logger.warning(f"robots.txt not accessible: {response.status_code}")
-                return {
-                    'allowed': True,  # Asumir permitido si no hay robots.txt
-                    'robots_url': robots_url,
-                    'crawl_delay': None,
-                    'disallow_paths': [],
-                    'status_code': response.status_code
-                }
-                
+                ttl = self.cache.ttl_from_headers(response.headers)
+            return self.cache.set(base_url, entry, ttl), False
+        
         except requests.RequestException as e:
             logger.error(f"Error checking robots.txt: {e}")
+            entry = {
+                'robots_url': robots_url,
+                'status_code': None,
+                'content': None,
+                'error': str(e)
+            }
+            return self.cache.set(base_url, entry, self.cache.min_ttl), False
+    
+    def check_robots_txt(self, url):
+        """Verifica robots.txt para una URL específica"""
+        parsed_url = url_parts(url)
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        
+        entry, from_cache = self.fetch_robots_txt(base_url)
+        robots_url = entry['robots_url']
+        
+        if entry.get('error'):
             return {
                 'allowed': True,  # Ser permisivo en caso de error
                 'robots_url': robots_url,
                 'crawl_delay': None,
                 'disallow_paths': [],
-                'error': str(e)
+                'error': entry['error'],
+                'from_cache': from_cache
             }
+        
+        if entry['status_code'] == 200:
+            robots_content = entry['content']
+            rules = parse_robots(robots_content).rules_for(self.user_agent)
+            
+            return {
+                'allowed': rules.allowed_url(url),
+                'robots_url': robots_url,
+                'crawl_delay': rules.crawl_delay,
+                'disallow_paths': list(rules.disallow_paths),
+                'raw_content': robots_content,
+                'from_cache': from_cache
+            }
+        
+        if not from_cache:
+            logger.warning(f"robots.txt not accessible: {entry['status_code']}")
+        return {
+            'allowed': True,  # Asumir permitido si no hay robots.txt
+            'robots_url': robots_url,
+            'crawl_delay': None,
+            'disallow_paths': [],
+            'status_code': entry['status_code'],
+            'from_cache': from_cache
+        }
     
     def is_url_allowed(self, robots_content, test_url, user_agent):
         """Verifica si una URL está permitida según robots.txt"""
-        parsed_url = urlparse(test_url)
-        path = parsed_url.path
-        
-        # Buscar reglas específicas para el user-agent
-        lines = robots_content.split('\n')
-        current_ua_rules = []
-        generic_rules = []
-        in_specific_ua_block = False
-        
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            
-            # Detectar inicio de bloque de User-Agent específico
-            if line.lower().startswith('user-agent:'):
-                ua = line.split(':', 1)[1].strip()
-                if ua == '*' or ua.lower() == user_agent.lower():
-                    in_specific_ua_block = True
-                elif in_specific_ua_block:
-                    # Hemos salido del bloque específico
-                    in_specific_ua_block = False
-                continue
-            
-            # Determinar en qué reglas estamos
-            if in_specific_ua_block:
-                current_ua_rules.append(line)
-            else:
-                generic_rules.append(line)
-        
-        # Priorizar reglas específicas sobre genéricas
-        all_rules = current_ua_rules + generic_rules
-        
-        # Procesar reglas
-        for rule in all_rules:
-            if rule.lower().startswith('disallow:'):
-                disallow_path = rule.split(':', 1)[1].strip()
-                if disallow_path == '':
-                    return True  # Disallow vacío = permitir todo
-                if path.startswith(disallow_path):
-                    return False
-            
-            elif rule.lower().startswith('allow:'):
-                allow_path = rule.split(':', 1)[1].strip()
-                if allow_path == '':
-                    continue
-                if path.startswith(allow_path):
-                    return True
-        
-        return True  # Por defecto, permitido
+        return parse_robots(robots_content).rules_for(user_agent).allowed_url(test_url)
     
     def get_crawl_delay(self, robots_content, user_agent):
         """Obtiene delay de crawling del robots.txt"""
-        lines = robots_content.split('\n')
-        crawl_delay = None
-        
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith('crawl-delay:'):
-                delay_str = line.split(':', 1)[1].strip()
-                try:
-                    crawl_delay = float(delay_str)
-                except ValueError:
-                    pass
-            elif line.lower().startswith('user-agent:'):
-                ua = line.split(':', 1)[1].strip()
-                if ua != '*' and ua.lower() != user_agent.lower():
-                    break  # Reglas específicas para otros UAs
-        
-        return crawl_delay
+        return parse_robots(robots_content).rules_for(user_agent).crawl_delay
     
     def get_disallow_paths(self, robots_content, user_agent):
         """Obtiene paths disallow del robots.txt"""
-        lines = robots_content.split('\n')
-        disallow_paths = []
+        return parse_robots(robots_content).rules_for(user_agent).disallow_paths
+    
+    def check_tos_simple(self, url, content=None):
+        """Verificación simple de términos de servicio, una vez por host
         
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith('disallow:'):
-                path = line.split(':', 1)[1].strip()
-                if path:
-                    disallow_paths.append(path)
+        Los enlaces a ToS pertenecen al sitio, no a cada perfil, así que el
+        resultado se guarda por esquema+host junto a la caché de robots.txt.
+        Si se pasa ``content`` (el HTML que el scraper ya descargó) se busca
+        primero ahí; solo si no aparecen enlaces se sondea la portada.
+        """
+        parsed_url = url_parts(url)
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        
+        cached = self.tos_cache.get(base_url)
+        if cached is not None:
+            return dict(cached, from_cache=True)
+        
+        if content is not None:
+            result = self.find_tos_links(url, content, 200)
+            if result['has_tos_links']:
+                self.tos_cache.set(base_url, result)
+                return dict(result, from_cache=False)
         
-        return disallow_paths
+        # Un solo sondeo de portada por host aunque varios hilos lleguen a la vez
+        with self.lock_for(f"tos:{base_url}"):
+            cached = self.tos_cache.get(base_url)
+            if cached is not None:
+                return dict(cached, from_cache=True)
+            
+            result = self.probe_homepage_tos(base_url)
+            ttl = self.tos_cache.min_ttl if result.get('error') else self.tos_cache.default_ttl
+            self.tos_cache.set(base_url, result, ttl)
+        return dict(result, from_cache=False)
     
-    def check_tos_simple(self, url):
-        """Verificación simple de términos de servicio"""
-        common_tos_paths = ['/terms', '/legal', '/privacy', '/tos', '/terms-of-service']
-        parsed_url = urlparse(url)
-        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    def probe_homepage_tos(self, base_url):
+        """Descarga la portada de un host y busca enlaces a ToS
+        
+        Es una petición de página más: respeta robots.txt y el presupuesto
+        del host en ``host_scheduler``, y usa la sesión compartida.
+        """
+        homepage_url = f"{base_url}/"
+        
+        robots = self.check_robots_txt(homepage_url)
+        if not robots.get('allowed', True):
+            return {
+                'has_tos_links': False,
+                'tos_links': [],
+                'skipped': 'homepage disallowed by robots.txt'
+            }
         
-        # Buscar enlaces a ToS en la página principal
         try:
-            response = requests.get(
-                url,
-                timeout=10,
+            host_scheduler.wait(host_scheduler.host_for(homepage_url), robots.get('crawl_delay'))
+            logger.info(f"Probing ToS links: {homepage_url}")
+            response = self.session.get(
+                homepage_url,
+                timeout=ROBOTS_CHECK['timeout'],
                 headers={'User-Agent': self.user_agent}
             )
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'lxml')
-                
-                # Buscar enlaces comunes a ToS
-                tos_links = []
-                for path in common_tos_paths:
-                    link = soup.find('a', href=re.compile(path, re.I))
-                    if link:
-                        href = link.get('href')
-                        full_url = urljoin(base_url, href)
-                        tos_links.append(full_url)
-                
-                return {
-                    'has_tos_links': len(tos_links) > 0,
-                    'tos_links': tos_links,
-                    'page_title': soup.title.string if soup.title else 'No title',
-                    'status_code': response.status_code
-                }
+                return self.find_tos_links(response.url or homepage_url, response.content, response.status_code)
+            
+            return {
+                'has_tos_links': False,
+                'tos_links': [],
+                'status_code': response.status_code
+            }
             
         except requests.RequestException as e:
             logger.error(f"Error checking ToS: {e}")
@@ -192,20 +362,63 @@ class RobotsChecker:
                 'error': str(e)
             }
     
-    def comprehensive_check(self, url):
-        """Verificación completa de robots.txt y ToS"""
+    def find_tos_links(self, page_url, content, status_code):
+        """Busca enlaces comunes a ToS en un documento HTML
+        
+        Los href relativos se resuelven contra ``page_url`` (la URL de la
+        página descargada, no la raíz del host).
+        """
+        common_tos_paths = ['/terms', '/legal', '/privacy', '/tos', '/terms-of-service']
+        # Solo interesan los enlaces: no construir el árbol completo
+        soup = BeautifulSoup(content, 'lxml', parse_only=SoupStrainer(['a', 'title']))
+        
+        tos_links = []
+        for path in common_tos_paths:
+            link = soup.find('a', href=re.compile(path, re.I))
+            if link:
+                href = link.get('href')
+                full_url = urljoin(page_url, href)
+                tos_links.append(full_url)
+        
+        result = {
+            'has_tos_links': len(tos_links) > 0,
+            'tos_links': tos_links,
+            'page_title': str(soup.title.string) if soup.title and soup.title.string else 'No title',
+            'status_code': status_code
+        }
+        soup.decompose()
+        return result
+    
+    def add_tos_check(self, decision, page_content=None):
+        """Completa una decisión de compliance con la verificación de ToS"""
+        tos_result = self.check_tos_simple(decision['url'], content=page_content)
+        decision['terms_of_service'] = tos_result
+        
+        if not tos_result.get('has_tos_links'):
+            decision['warnings'].append("No obvious terms of service links found")
+        
+        return decision
+    
+    def comprehensive_check(self, url, page_content=None, check_tos=True):
+        """Verificación completa de robots.txt y ToS
+        
+        Devuelve una única decisión por URL con ``overall_allowed`` y
+        ``recommended_delay``. Con ``check_tos=False`` solo se consulta
+        robots.txt (cacheado); la verificación de ToS puede añadirse después
+        con ``add_tos_check`` reutilizando el cuerpo de la página.
+        """
         logger.info(f"Comprehensive check for: {url}")
         
         robots_result = self.check_robots_txt(url)
-        tos_result = self.check_tos_simple(url)
+        crawl_delay = robots_result.get('crawl_delay')
         
         comprehensive_result = {
             'url': url,
             'timestamp': time.time(),
             'robots_txt': robots_result,
-            'terms_of_service': tos_result,
+            'terms_of_service': {'skipped': True},
             'overall_allowed': robots_result.get('allowed', True),
-            'recommended_delay': robots_result.get('crawl_delay', 2),
+            'recommended_delay': crawl_delay or RATE_LIMIT_CONFIG['DELAY_BETWEEN_REQUESTS'],
             'warnings': []
         }
         
@@ -213,13 +426,12 @@ class RobotsChecker:
         if not comprehensive_result['overall_allowed']:
             comprehensive_result['warnings'].append("Scraping not allowed by robots.txt")
         
-        if not tos_result.get('has_tos_links'):
-            comprehensive_result['warnings'].append("No obvious terms of service links found")
-        
-        crawl_delay = robots_result.get('crawl_delay')
         if crawl_delay and crawl_delay > 5:
             comprehensive_result['warnings'].append(f"High crawl delay: {crawl_delay}s")
         
+        if check_tos:
+            self.add_tos_check(comprehensive_result, page_content)
+        
         return comprehensive_result
 
 
@@ -227,18 +439,18 @@ class RobotsChecker:
 robots_checker = RobotsChecker()
 
 # Funciones de conveniencia
-def check_site_compliance(url):
+def check_site_compliance(url, check_tos=True):
     """Función simple para verificar compliance de un sitio"""
-    return robots_checker.comprehensive_check(url)
+    return robots_checker.comprehensive_check(url, check_tos=check_tos)
 
 def is_site_scrapable(url):
     """Verifica si un sitio es scrapeable según robots.txt"""
-    result = check_site_compliance(url)
+    result = check_site_compliance(url, check_tos=False)
     return result['overall_allowed']
 
 def get_recommended_delay(url):
     """Obtiene delay recomendado para un sitio"""
-    result = check_site_compliance(url)
+    result = check_site_compliance(url, check_tos=False)
     return result['recommended_delay']
 
 
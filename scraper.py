@@ -3,293 +3,137 @@ Módulo principal de scraping
 """
 
 import requests
-from bs4 import BeautifulSoup
 import time
 import json
 import logging
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
-import hashlib
+from urllib.parse import urljoin
+import importlib
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
 
-from config import HEADERS, TIMEOUT_CONFIG, BASE_URLS
-from rate_limiter import rate_limiter, metrics
-from robots_checker import is_site_scrapable, get_recommended_delay
+from config import HEADERS, TIMEOUT_CONFIG, EXTRACTION_CONFIG, STREAMING_CONFIG
+from rate_limiter import rate_limiter, host_scheduler, metrics
+from robots_checker import robots_checker
+from http_cache import http_cache, CachingAdapter
+from archive import page_archive
+from selector_engine import IncrementalParser
+from selector_stats import selector_stats
+from extractors import registry
+from canonical_url import CanonicalURL, url_parts
 
 logger = logging.getLogger(__name__)
 
-class DataExtractor:
-    """Extractor base de datos"""
-    
-    def __init__(self, source_name):
-        self.source_name = source_name
-        self.base_url = BASE_URLS.get(source_name)
-        
-    def generate_id(self, data):
-        """Genera ID único para un registro"""
-        timestamp = int(time.time() * 1000)  # milliseconds
-        identifier = f"{self.source_name}_{timestamp}"
-        
-        # Si tenemos nombre y website, agregar hash
-        if data.get('name') and data.get('website'):
-            hash_input = f"{data['name']}_{data['website']}"
-            hash_suffix = hashlib.md5(hash_input.encode()).hexdigest()[:8]
-            identifier = f"{self.source_name}_{timestamp}_{hash_suffix}"
-        
-        return identifier
-    
-    def extract_basic_data(self, soup, url):
-        """Extrae datos básicos del HTML"""
-        return {
-            'id': None,  # Se genera después
-            'name': '',
-            'website': '',
-            'description': '',
-            'source': self.source_name,
-            'scraped_at': datetime.utcnow().isoformat() + 'Z',
-            'source_url': url
-        }
-    
-    def validate_data(self, data):
-        """Valida datos extraídos"""
-        if not data.get('name') or not data.get('website'):
-            return False, "Missing required fields"
-        
-        # Validar URL
-        if not data['website'].startswith(('http://', 'https://')):
-            return False, "Invalid URL format"
-        
-        return True, "Valid"
-
-
-class CrunchbaseExtractor(DataExtractor):
-    """Extractor específico para Crunchbase"""
-    
-    def __init__(self):
-        super().__init__('crunchbase')
-        self.selectors = {
-            'company_name': [
-                'h1[class*="profile"]',
-                '.profile-header h1',
-                'h1.company-name'
-            ],
-            'website': [
-                'a[href*="website"]',
-                '[data-test="company-website"]',
-                '.company-link a'
-            ],
-            'description': [
-                '.description',
-                '.about-company',
-                '.company-summary'
-            ]
-        }
-    
-    def extract_data(self, soup, url):
-        """Extrae datos específicos de Crunchbase"""
-        data = self.extract_basic_data(soup, url)
-        
-        # Nombre de la empresa
-        data['name'] = self.extract_with_selectors(soup, self.selectors['company_name'])
-        
-        # Website
-        website = self.extract_with_selectors(soup, self.selectors['website'])
-        if website and not website.startswith('http'):
-            website = f"https://{website}"
-        data['website'] = website
-        
-        # Descripción
-        data['description'] = self.extract_with_selectors(soup, self.selectors['description'])
-        
-        # Generar ID único
-        data['id'] = self.generate_id(data)
-        
-        return data
-    
-    def extract_with_selectors(self, soup, selectors):
-        """Intenta múltiples selectores hasta encontrar datos"""
-        for selector in selectors:
-            try:
-                elements = soup.select(selector)
-                if elements:
-                    # Tomar el primer elemento no vacío
-                    for element in elements:
-                        text = element.get_text(strip=True)
-                        if text:
-                            return text
-            except Exception as e:
-                logger.debug(f"Selector failed: {selector} - {e}")
-                continue
-        return ""
-
-
-class AngelListExtractor(DataExtractor):
-    """Extractor específico para AngelList"""
-    
-    def __init__(self):
-        super().__init__('angellist')
-        self.selectors = {
-            'company_name': [
-                '.startup-name',
-                'h1[class*="name"]',
-                '.profile-title'
-            ],
-            'website': [
-                '.company-url',
-                'a[href^="http"]',
-                '.website-link'
-            ],
-            'tagline': [
-                '.tagline',
-                '.company-tagline',
-                '.profile-tagline'
-            ]
-        }
-    
-    def extract_data(self, soup, url):
-        """Extrae datos específicos de AngelList"""
-        data = self.extract_basic_data(soup, url)
-        
-        # Nombre de la empresa
-        data['name'] = self.extract_with_selectors(soup, self.selectors['company_name'])
-        
-        # Website
-        website = self.extract_with_selectors(soup, self.selectors['website'])
-        if website and not website.startswith('http'):
-            website = f"https://{website}"
-        data['website'] = website
-        
-        # Tagline como descripción
-        tagline = self.extract_with_selectors(soup, self.selectors['tagline'])
-        data['description'] = tagline
-        
-        # Generar ID único
-        data['id'] = self.generate_id(data)
-        
-        return data
-    
-    def extract_with_selectors(self, soup, selectors):
-        """Intenta múltiples selectores hasta encontrar datos"""
-        for selector in selectors:
-            try:
-                elements = soup.select(selector)
-                if elements:
-                    for element in elements:
-                        text = element.get_text(strip=True)
-                        if text:
-                            return text
-            except Exception as e:
-                logger.debug(f"Selector failed: {selector} - {e}")
-                continue
-        return ""
-
-
-class ProductHuntExtractor(DataExtractor):
-    """Extractor específico para Product Hunt"""
-    
-    def __init__(self):
-        super().__init__('producthunt')
-        self.selectors = {
-            'product_name': [
-                'h1[class*="name"]',
-                '.product-title',
-                '.item-title'
-            ],
-            'website': [
-                '.website-link',
-                'a[href^="http"]',
-                '.product-link'
-            ],
-            'tagline': [
-                '.tagline',
-                '.product-tagline',
-                '.summary'
-            ]
-        }
-    
-    def extract_data(self, soup, url):
-        """Extrae datos específicos de Product Hunt"""
-        data = self.extract_basic_data(soup, url)
-        
-        # Nombre del producto
-        data['name'] = self.extract_with_selectors(soup, self.selectors['product_name'])
-        
-        # Website
-        website = self.extract_with_selectors(soup, self.selectors['website'])
-        if website and not website.startswith('http'):
-            website = f"https://{website}"
-        data['website'] = website
-        
-        # Tagline como descripción
-        tagline = self.extract_with_selectors(soup, self.selectors['tagline'])
-        data['description'] = tagline
-        
-        # Generar ID único
-        data['id'] = self.generate_id(data)
-        
-        return data
-    
-    def extract_with_selectors(self, soup, selectors):
-        """Intenta múltiples selectores hasta encontrar datos"""
-        for selector in selectors:
-            try:
-                elements = soup.select(selector)
-                if elements:
-                    for element in elements:
-                        text = element.get_text(strip=True)
-                        if text:
-                            return text
-            except Exception as e:
-                logger.debug(f"Selector failed: {selector} - {e}")
-                continue
-        return ""
+# Clases que antes vivían en este módulo: se importan de extractors/ al pedirlas
+EXTRACTOR_CLASSES = {
+    'DataExtractor': 'extractors.base',
+    'CrunchbaseExtractor': 'extractors.crunchbase',
+    'AngelListExtractor': 'extractors.angellist',
+    'ProductHuntExtractor': 'extractors.producthunt',
+    'GitHubExtractor': 'extractors.github'
+}
 
+def __getattr__(name):
+    """Re-exporta de forma perezosa las clases extractoras (``from scraper import CrunchbaseExtractor``)"""
+    module = EXTRACTOR_CLASSES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
 
 class Scraper:
     """Scraper principal"""
     
     def __init__(self):
-        self.extractors = {
-            'crunchbase': CrunchbaseExtractor(),
-            'angellist': AngelListExtractor(),
-            'producthunt': ProductHuntExtractor()
-        }
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
-        
-    def scrape_url(self, url, max_retries=3):
+        # Cada extractor se carga la primera vez que llega una URL de su fuente
+        self.extractors = registry
+        # Una requests.Session por hilo: Session no es thread-safe
+        self.local = threading.local()
+        # El sondeo de ToS es una petición de página más: misma sesión y caché
+        robots_checker.session_provider = lambda: self.session
+    
+    @property
+    def session(self):
+        """Sesión HTTP del hilo actual"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            if http_cache is not None:
+                adapter = CachingAdapter(http_cache)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+            self.local.session = session
+        return session
+        
+    def scrape_url(self, url, max_retries=3, check_tos=True):
         """Scrapea una URL específica"""
+        # Se parsea una sola vez; robots, rate limiter y extractor reutilizan los componentes
+        url = CanonicalURL(url)
+        content = self.fetch_url(url, max_retries=max_retries, check_tos=check_tos)
+        return self.parse_content(content, url)
+    
+    def fetch_url(self, url, max_retries=3, check_tos=True, streaming=None):
+        """Descarga una URL y devuelve el cuerpo crudo (bytes)
+        
+        La compliance se evalúa una sola vez por URL (robots.txt cacheado) y
+        la verificación de ToS se resuelve por host (cacheada, reutilizando el
+        cuerpo descargado), de modo que cada URL cuesta un request de página.
+        ``streaming`` (por defecto, ``STREAMING_CONFIG['enabled']``) permite
+        forzar la descarga completa, p. ej. de páginas de listado.
+        """
+        url = CanonicalURL(url)
         logger.info(f"Starting scrape: {url}")
         
         # Verificar compliance
-        if not is_site_scrapable(url):
+        compliance = robots_checker.comprehensive_check(url, check_tos=False)
+        if not compliance['overall_allowed']:
             raise ValueError(f"Scraping not allowed for {url}")
         
-        # Aplicar delay recomendado
-        recommended_delay = get_recommended_delay(url)
-        if recommended_delay > 2:
-            logger.info(f"Using recommended delay: {recommended_delay}s")
-            time.sleep(recommended_delay)
-        
-        # Rate limiting
-        rate_limiter.wait_if_needed()
+        # Rate limiting por host, con el Crawl-delay de robots.txt
+        host_scheduler.wait(
+            host_scheduler.host_for(url),
+            crawl_delay=compliance['robots_txt'].get('crawl_delay')
+        )
         
         # Hacer request
+        if streaming is None:
+            streaming = STREAMING_CONFIG['enabled']
         for attempt in range(max_retries):
             try:
                 logger.debug(f"Request attempt {attempt + 1}/{max_retries}")
                 
                 response = self.session.get(
-                    url,
-                    timeout=TIMEOUT_CONFIG['request_timeout']
+                    url.original,
+                    timeout=TIMEOUT_CONFIG['request_timeout'],
+                    stream=streaming
                 )
                 
                 # Verificar status code
                 if response.status_code == 200:
                     metrics.update_request(success=True)
-                    return self.parse_response(response, url)
+                    if streaming:
+                        content, truncated = self.read_streaming(response, url)
+                    else:
+                        content, truncated = response.content, False
+                    
+                    if check_tos:
+                        # Los enlaces a ToS suelen ir en el pie: con el cuerpo cortado se sondea la portada
+                        robots_checker.add_tos_check(compliance, None if truncated else content)
+                        for warning in compliance['warnings']:
+                            logger.warning(f"Compliance warning for {url}: {warning}")
+                    
+                    # Una página a medias no debe quedar en el archivo como si estuviera completa
+                    if truncated:
+                        logger.debug(f"Not archiving truncated body of {url}")
+                    else:
+                        self.archive_page(url, content)
+                    return content
                 
-                elif response.status_code == 429:
+                response.close()  # En modo streaming el cuerpo no se ha leído
+                
+                if response.status_code == 429:
                     # Rate limited
                     metrics.update_request(success=False, rate_limited=True)
                     retry_after = int(response.headers.get('Retry-After', 60))
@@ -312,61 +156,238 @@ class Scraper:
         
         raise Exception(f"Max retries reached for {url}")
     
+    def read_streaming(self, response, url):
+        """Lee el cuerpo por bloques y corta la descarga en cuanto no hace falta más
+        
+        Los bloques se van añadiendo a un árbol lxml incremental y, en
+        progresión geométrica de bytes recibidos, se pregunta al extractor si
+        ya tiene sus campos requeridos (JSON embebido o selectores sobre
+        elementos ya cerrados). Nunca se leen más de ``max_body_size`` bytes.
+        Devuelve (cuerpo, truncated), con truncated=True si la descarga se
+        cortó antes del final.
+        """
+        extractor = self.get_extractor_for_url(url)
+        max_body_size = STREAMING_CONFIG['max_body_size']
+        next_check = STREAMING_CONFIG['first_check']
+        
+        # charset de la cabecera si lo hay; si no, lxml lo detecta del meta
+        content_type = response.headers.get('Content-Type', '').lower()
+        document = IncrementalParser(response.encoding if 'charset' in content_type else None)
+        
+        chunks = []
+        received = 0
+        fed = 0
+        truncated = False
+        try:
+            for chunk in response.iter_content(chunk_size=STREAMING_CONFIG['chunk_size']):
+                chunks.append(chunk)
+                received += len(chunk)
+                
+                if received >= max_body_size:
+                    logger.warning(f"Response body of {url} exceeds {max_body_size} bytes; truncated")
+                    truncated = True
+                    break
+                
+                if extractor is not None and received >= next_check:
+                    next_check = received * 2
+                    # El parser push de libxml2 es lento con muchos bloques pequeños:
+                    # se le da todo lo pendiente de una vez, solo al comprobar
+                    content = b''.join(chunks)
+                    document.feed(content[fed:])
+                    fed = len(content)
+                    if extractor.has_required_fields(content, document.root, url):
+                        logger.debug(f"Required fields found after {received} bytes; closing {url}")
+                        truncated = True
+                        break
+        finally:
+            response.close()  # Cierra la conexión sin leer el resto
+        
+        return b''.join(chunks)[:max_body_size], truncated
+    
+    def archive_page(self, url, content):
+        """Guarda el cuerpo descargado en el archivo de HTML crudo"""
+        if page_archive is None:
+            return
+        extractor = self.get_extractor_for_url(url)
+        source = extractor.source_name if extractor else url_parts(url).netloc.lower()
+        try:
+            page_archive.put(url, content, source)
+        except Exception as e:
+            # Un fallo del archivo no debe tirar el scraping
+            logger.warning(f"Could not archive {url}: {e}")
+    
     def parse_response(self, response, url):
         """Parsea la respuesta HTTP"""
-        soup = BeautifulSoup(response.content, 'lxml')
+        return self.parse_content(response.content, url)
+    
+    def parse_content(self, content, url):
+        """Parsea el HTML crudo de una página ya descargada"""
+        data = self.extract(content, url)
+        self.record_extracted(data)
+        return data
+    
+    def extract(self, content, url, validate=True):
+        """Parseo + extracción + validación, sin efectos sobre las métricas
         
+        Es la parte CPU-intensiva y no comparte estado con la descarga, por
+        lo que puede ejecutarse en otro proceso (ver ``extract_record``).
+        """
         # Determinar extractor basado en el dominio
         extractor = self.get_extractor_for_url(url)
         if not extractor:
             raise ValueError(f"No extractor found for URL: {url}")
         
-        # Extraer datos
-        data = extractor.extract_data(soup, url)
+        # Camino rápido: datos estructurados embebidos, sin DOM
+        fields = extractor.extract_embedded(content, url) if EXTRACTION_CONFIG['embedded_json'] else {}
+        if fields.get('name') and fields.get('website'):
+            data = extractor.build_record(fields, url)
+        else:
+            # Extraer datos del DOM
+            data = self.extract_document(extractor, content, url, extractor.extract_data)
+            # Algún campo fuera de las regiones declaradas: documento completo
+            if extractor.parsed_regions() and not (data['name'] and data['website'] and data['description']):
+                data = self.extract_document(extractor, content, url, extractor.extract_data,
+                                             regions=False)
+            if fields:
+                data = extractor.complete_record(data, fields)
+        
+        # Validar datos (el pipeline lo hace en su propia etapa)
+        if validate:
+            is_valid, message = extractor.validate_data(data)
+            if not is_valid:
+                logger.warning(f"Data validation failed: {message}")
+        
+        return data
+    
+    def extract_listing(self, content, url, validate=True):
+        """Como ``extract``, pero devuelve un registro por entrada de una página de listado"""
+        extractor = self.get_extractor_for_url(url)
+        if not extractor:
+            raise ValueError(f"No extractor found for URL: {url}")
+        
+        records = self.extract_document(extractor, content, url, extractor.extract_listing)
+        if not records and extractor.parsed_regions():
+            records = self.extract_document(extractor, content, url, extractor.extract_listing,
+                                            regions=False)
         
-        # Validar datos
-        is_valid, message = extractor.validate_data(data)
-        if not is_valid:
-            logger.warning(f"Data validation failed: {message}")
+        if validate:
+            for data in records:
+                is_valid, message = extractor.validate_data(data)
+                if not is_valid:
+                    logger.warning(f"Data validation failed for {data['name']}: {message}")
         
-        metrics.records_extracted += 1
+        logger.debug(f"Listing {url}: {len(records)} records")
+        return records
+    
+    def extract_document(self, extractor, content, url, extract, regions=True):
+        """Parsea el documento, aplica ``extract`` y lo libera"""
+        document = extractor.parse(content, regions=regions)
+        try:
+            return extract(document, url)
+        finally:
+            extractor.release(document)
+            document = None
+    
+    def scrape_listing(self, url, max_retries=3, check_tos=True):
+        """Scrapea una página de listado: un request, todos sus registros"""
+        url = CanonicalURL(url)
+        # Sin streaming: cortar la descarga perdería las entradas del final
+        content = self.fetch_url(url, max_retries=max_retries, check_tos=check_tos, streaming=False)
+        records = self.extract_listing(content, url)
+        for data in records:
+            self.record_extracted(data)
+        return records
+    
+    def record_extracted(self, data):
+        """Contabiliza un registro extraído"""
+        metrics.add_records()
         logger.info(f"Extracted data: {data.get('name', 'Unknown')} from {data.get('source', 'Unknown')}")
-        
-        return data
     
     def get_extractor_for_url(self, url):
         """Determina qué extractor usar para una URL"""
-        domain = urlparse(url).netloc.lower()
-        
-        if 'crunchbase' in domain:
-            return self.extractors['crunchbase']
-        elif 'angel.co' in domain:
-            return self.extractors['angellist']
-        elif 'producthunt' in domain:
-            return self.extractors['producthunt']
-        
-        return None
+        return self.extractors.for_url(url)
     
-    def scrape_multiple_urls(self, urls):
-        """Scrapea múltiples URLs"""
-        results = []
-        errors = []
-        
-        logger.info(f"Starting batch scrape of {len(urls)} URLs")
-        
-        for i, url in enumerate(urls, 1):
-            try:
-                logger.info(f"Processing {i}/{len(urls)}: {url}")
-                data = self.scrape_url(url)
-                results.append(data)
-                
-            except Exception as e:
-                logger.error(f"Failed to scrape {url}: {e}")
-                errors.append({
-                    'url': url,
-                    'error': str(e),
-                    'timestamp': datetime.now().isoformat()
-                })
+    def scrape_one(self, url):
+        """Scrapea una URL capturando el error: devuelve (ok, datos o error)"""
+        try:
+            return True, self.scrape_url(url)
+        except Exception as e:
+            return self.scrape_error(url, e)
+    
+    def scrape_error(self, url, error):
+        """Registro de error de una URL en el formato de los batches"""
+        logger.error(f"Failed to scrape {url}: {error}")
+        return False, {
+            'url': url,
+            'error': str(error),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def fetch_and_submit(self, url, parse_pool):
+        """Descarga una URL y envía su parseo al pool de procesos"""
+        try:
+            content = self.fetch_url(url)
+        except Exception as e:
+            return self.scrape_error(url, e)
+        return True, parse_pool.submit(extract_with_stats, content, url)
+    
+    def resolve_parse(self, url, outcome):
+        """Espera el resultado de un parseo enviado al pool de procesos"""
+        ok, payload = outcome
+        if not ok:
+            return outcome
+        try:
+            data, stats_delta = payload.result()
+        except Exception as e:
+            return self.scrape_error(url, e)
+        if selector_stats is not None:
+            selector_stats.merge(stats_delta)
+        self.record_extracted(data)
+        return True, data
+    
+    def scrape_multiple_urls(self, urls, workers=1, parse_workers=0):
+        """Scrapea múltiples URLs
+        
+        Con ``workers > 1`` las descargas se reparten en un pool de hilos
+        (una ``requests.Session`` por hilo); con ``parse_workers > 0`` el
+        parseo y la extracción se hacen en un ``ProcessPoolExecutor`` que
+        solo devuelve el dict del registro, de modo que el parseo escala
+        con los núcleos mientras el bucle de descarga sigue enviando.
+        Los resultados y errores se devuelven siempre en el orden de entrada.
+        """
+        urls = [CanonicalURL(url) for url in urls]
+        outcomes = [None] * len(urls)
+        
+        logger.info(f"Starting batch scrape of {len(urls)} URLs with {workers} worker(s)"
+                    f" and {parse_workers} parse process(es)")
+        
+        # Intercalar hosts: cada URL sale del host que antes tenga capacidad
+        ordered = host_scheduler.iter_ready(enumerate(urls), key=lambda item: item[1])
+        
+        with ExitStack() as stack:
+            if parse_workers > 0:
+                parse_pool = stack.enter_context(ProcessPoolExecutor(max_workers=parse_workers))
+                task = lambda url: self.fetch_and_submit(url, parse_pool)
+            else:
+                task = self.scrape_one
+            
+            if workers <= 1:
+                for i, (index, url) in enumerate(ordered, 1):
+                    logger.info(f"Processing {i}/{len(urls)}: {url}")
+                    outcomes[index] = task(url)
+            else:
+                pool = stack.enter_context(ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch'))
+                futures = {pool.submit(task, url): index for index, url in ordered}
+                for i, future in enumerate(as_completed(futures), 1):
+                    index = futures[future]
+                    outcomes[index] = future.result()
+                    logger.info(f"Processed {i}/{len(urls)}: {urls[index]}")
+            
+            if parse_workers > 0:
+                outcomes = [self.resolve_parse(url, outcome) for url, outcome in zip(urls, outcomes)]
+        
+        results = [data for ok, data in outcomes if ok]
+        errors = [error for ok, error in outcomes if not ok]
         
         logger.info(f"Batch complete: {len(results)} successful, {len(errors)} errors")
         
@@ -377,13 +398,32 @@ class Scraper:
 scraper = Scraper()
 
 # Funciones de conveniencia
+def extract_record(content, url, validate=True):
+    """Parsea HTML crudo y devuelve el registro (apto para ProcessPoolExecutor)"""
+    return scraper.extract(content, url, validate=validate)
+
+def extract_with_stats(content, url, validate=True):
+    """Como ``extract_record``, pero devuelve también los aciertos de selectores del worker
+    
+    Los contadores de un proceso worker no se ven desde el padre: el delta
+    se devuelve junto al registro y el padre lo incorpora con
+    ``selector_stats.merge``.
+    """
+    data = scraper.extract(content, url, validate=validate)
+    return data, selector_stats.take_delta() if selector_stats is not None else {}
+
+def extract_listing_with_stats(content, url, validate=True):
+    """Como ``extract_with_stats`` para páginas de listado (devuelve la lista de registros)"""
+    records = scraper.extract_listing(content, url, validate=validate)
+    return records, selector_stats.take_delta() if selector_stats is not None else {}
+
 def scrape_company(url):
     """Función simple para scrapeer una empresa"""
     return scraper.scrape_url(url)
 
-def scrape_multiple_companies(urls):
+def scrape_multiple_companies(urls, workers=1, parse_workers=0):
     """Función simple para scrapeer múltiples empresas"""
-    return scraper.scrape_multiple_urls(urls)
+    return scraper.scrape_multiple_urls(urls, workers=workers, parse_workers=parse_workers)
 
 
 if __name__ == "__main__":
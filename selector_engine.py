@@ -0,0 +1,480 @@
+"""
+Motor de selectores compilados: CSS → XPath evaluado sobre árboles lxml
+"""
+
+import re
+import logging
+from functools import lru_cache
+
+import lxml.html
+from lxml import etree
+
+try:
+    from cssselect import HTMLTranslator
+except ImportError:  # Opcional: sin cssselect se usa el traductor propio
+    HTMLTranslator = None
+
+logger = logging.getLogger(__name__)
+
+# Elementos de texto crudo: su contenido termina en el primer cierre
+RAW_TEXT_TAGS = (b'script', b'style', b'textarea', b'title', b'iframe', b'noscript')
+
+# Tamaño de los bloques con que se alimenta el parser incremental
+PARSE_CHUNK_SIZE = 64 * 1024
+
+# Texto visible de un elemento: como get_text() de BeautifulSoup, sin script/style
+TEXT_XPATH = etree.XPath('.//text()[not(ancestor::script) and not(ancestor::style)]')
+
+# Tokens del subconjunto de CSS soportado por el traductor propio
+TOKEN_RE = re.compile(r'''
+    (?P<ws>\s*(?P<comb>[>+~,])\s*|\s+)
+  | (?P<tag>\*|[A-Za-z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~|]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[\w-]+))\s*)?\]
+''', re.VERBOSE)
+
+
+def xpath_literal(value):
+    """Literal XPath para un valor (con comillas simples o dobles)"""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    raise ValueError(f"Unsupported quotes in selector value: {value!r}")
+
+
+def attribute_condition(attr, op, value):
+    """Condición XPath de un selector de atributo"""
+    name = f"@{attr.lower()}"
+    if op is None:
+        return name
+    literal = xpath_literal(value)
+    if op == '=':
+        return f"{name} = {literal}"
+    if op in ('*=', '^=', '$=') and not value:
+        return "false()"  # CSS: un valor vacío nunca coincide
+    if op == '*=':
+        return f"contains({name}, {literal})"
+    if op == '^=':
+        return f"starts-with({name}, {literal})"
+    if op == '$=':
+        return (f"substring({name}, string-length({name}) - string-length({literal}) + 1)"
+                f" = {literal}")
+    if op == '~=':
+        return f"contains(concat(' ', normalize-space({name}), ' '), concat(' ', {literal}, ' '))"
+    if op == '|=':
+        return f"({name} = {literal} or starts-with({name}, concat({literal}, '-')))"
+    raise ValueError(f"Unsupported attribute operator: {op}")
+
+
+def css_to_xpath(selector):
+    """Traduce un selector CSS simple a XPath
+
+    Soporta etiquetas, ``*``, ``#id``, ``.clase``, selectores de atributo
+    (``[a]``, ``=``, ``*=``, ``^=``, ``$=``, ``~=``, ``|=``), los combinadores
+    descendiente y ``>``, y grupos separados por comas. Cualquier otra cosa
+    (pseudo-clases, ``+``, ``~``) lanza ValueError.
+    """
+    paths = []
+    steps = []
+    axis = 'descendant-or-self::'
+    tag = None
+    conditions = []
+    pos = 0
+
+    def close_step():
+        nonlocal tag, conditions
+        if tag is None and not conditions:
+            raise ValueError(f"Empty compound selector in {selector!r}")
+        predicates = ''.join(f"[{condition}]" for condition in conditions)
+        steps.append(f"{axis}{tag or '*'}{predicates}")
+        tag, conditions = None, []
+
+    selector = selector.strip()
+    while pos < len(selector):
+        match = TOKEN_RE.match(selector, pos)
+        if not match:
+            raise ValueError(f"Unsupported selector syntax at {selector[pos:]!r}")
+        pos = match.end()
+
+        if match.group('ws') is not None:
+            combinator = match.group('comb')
+            close_step()
+            if combinator == ',':
+                paths.append('/'.join(steps))
+                steps, axis = [], 'descendant-or-self::'
+            elif combinator == '>':
+                axis = ''
+            elif combinator is None:
+                axis = 'descendant::'
+            else:
+                raise ValueError(f"Unsupported combinator {combinator!r} in {selector!r}")
+        elif match.group('tag'):
+            if tag is not None or conditions:
+                raise ValueError(f"Misplaced type selector in {selector!r}")
+            tag = match.group('tag').lower()
+        elif match.group('id'):
+            conditions.append(f"@id = {xpath_literal(match.group('id'))}")
+        elif match.group('cls'):
+            conditions.append(
+                f"contains(concat(' ', normalize-space(@class), ' '), ' {match.group('cls')} ')"
+            )
+        else:
+            value = match.group('dq')
+            if value is None:
+                value = match.group('sq')
+            if value is None:
+                value = match.group('bare')
+            conditions.append(attribute_condition(match.group('attr'), match.group('op'), value))
+
+    close_step()
+    paths.append('/'.join(steps))
+    return ' | '.join(paths)
+
+
+def compile_selector(selector):
+    """Compila un selector CSS a un ``etree.XPath`` (cssselect si está instalado)"""
+    if HTMLTranslator is not None:
+        expression = HTMLTranslator().css_to_xpath(selector)
+    else:
+        expression = css_to_xpath(selector)
+    return etree.XPath(expression)
+
+
+def element_text(element):
+    """Texto de un elemento sin espacios sobrantes (equivale a ``get_text(strip=True)``)"""
+    return ''.join(text.strip() for text in TEXT_XPATH(element) if text.strip())
+
+
+def detect_encoding(content):
+    """'utf-8' si los bytes son UTF-8 válido; None para que lxml use el meta charset"""
+    if isinstance(content, bytes):
+        try:
+            content.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return None
+    return None
+
+
+def parse_html(content, skip_tags=(), regions=None):
+    """Parsea HTML crudo con lxml; None si el documento está vacío o no es parseable
+
+    Sin ``skip_tags`` ni ``regions`` construye el árbol completo. Con ellos
+    los elementos descartados ni siquiera llegan al parser (ver
+    ``strip_elements`` y ``parse_regions``). Si el documento no tiene
+    ninguna de las ``regions`` se construye el árbol completo.
+    """
+    content = strip_elements(content, skip_tags)
+    if regions:
+        tree = parse_regions(content, regions)
+        if tree is not None:
+            return tree
+
+    encoding = detect_encoding(content)
+    parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+    try:
+        return lxml.html.fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=32)
+def skip_pattern(tags):
+    """Regex que encuentra comentarios y aperturas de las etiquetas a descartar"""
+    names = b'|'.join(re.escape(tag.encode('ascii')) for tag in tags)
+    return re.compile(rb'<!--|<(' + names + rb')(?=[\s/>])')
+
+
+@lru_cache(maxsize=32)
+def nesting_pattern(tag):
+    """Regex de aperturas/cierres de una etiqueta, para seguir su anidamiento"""
+    return re.compile(rb'<(/?)' + re.escape(tag) + rb'(?=[\s/>])[^>]*?(/?)>')
+
+
+def find_element_end(lowered, tag, start):
+    """Offset tras el cierre del elemento que abre en ``start`` (-1 si no cierra)"""
+    if tag in RAW_TEXT_TAGS:
+        # Texto crudo: termina en el primer cierre, como en el navegador
+        close = lowered.find(b'</' + tag, start)
+        if close == -1:
+            return -1
+        close = lowered.find(b'>', close)
+        return -1 if close == -1 else close + 1
+
+    depth = 0
+    for match in nesting_pattern(tag).finditer(lowered, start):
+        if match.group(1):
+            depth -= 1
+        elif not match.group(2):
+            depth += 1
+        if depth <= 0:
+            return match.end()
+    return -1
+
+
+def strip_elements(content, skip_tags):
+    """Quita del HTML crudo los comentarios y los elementos de ``skip_tags``
+
+    Trabaja sobre los bytes, antes de parsear: los scripts, estilos o SVG
+    que no lee ningún selector no se tokenizan ni ocupan memoria en el
+    árbol. Un elemento sin cierre se deja tal cual para el parser.
+    """
+    if not skip_tags or not isinstance(content, bytes):
+        return content
+
+    lowered = content.lower()
+    pattern = skip_pattern(tuple(skip_tags))
+    parts = []
+    pos = 0
+
+    while True:
+        match = pattern.search(lowered, pos)
+        if not match:
+            break
+        if match.group(1) is None:
+            end = lowered.find(b'-->', match.end())
+            end = -1 if end == -1 else end + 3
+        else:
+            end = find_element_end(lowered, match.group(1), match.start())
+        if end == -1:
+            break
+        parts.append(content[pos:match.start()])
+        pos = end
+
+    if not parts:
+        return content
+    parts.append(content[pos:])
+    return b''.join(parts)
+
+
+def parse_regions(content, regions, chunk_size=PARSE_CHUNK_SIZE):
+    """Parseo incremental que solo conserva las regiones declaradas
+
+    El HTML se alimenta por bloques a un ``HTMLPullParser``; cada elemento
+    que se cierra sin ser ni contener una región se vacía al momento. Las
+    regiones se conservan enteras junto con sus ancestros, así que los
+    selectores con contexto (``.header h1``) siguen funcionando, y el árbol
+    nunca llega a tener el documento entero en memoria. Devuelve None si el
+    documento no es parseable o no contiene ninguna región.
+    """
+    regions = frozenset(regions)
+    parser = etree.HTMLPullParser(events=('start', 'end'), encoding=detect_encoding(content),
+                                  remove_comments=True)
+    region_depth = 0        # > 0 mientras estamos dentro de una región
+    found = False
+    keep_stack = []         # Por cada elemento abierto: si contiene una región
+
+    def prune():
+        nonlocal region_depth, found
+        for event, element in parser.read_events():
+            if event == 'start':
+                keep_stack.append(False)
+                if element.tag in regions:
+                    region_depth += 1
+                    found = True
+                continue
+
+            contains_region = keep_stack.pop() if keep_stack else False
+            if element.tag in regions:
+                region_depth -= 1
+                contains_region = True
+            elif region_depth == 0 and not contains_region:
+                element.clear(keep_tail=True)
+            if contains_region and keep_stack:
+                keep_stack[-1] = True
+
+    try:
+        for start in range(0, len(content), chunk_size):
+            parser.feed(content[start:start + chunk_size])
+            prune()
+        root = parser.close()
+        prune()
+    except (etree.ParserError, etree.XMLSyntaxError, ValueError):
+        return None
+    return root if found else None
+
+
+class CompiledSelectors:
+    """Selectores de un extractor compilados a XPath una sola vez
+
+    ``compiled`` mapea cada selector CSS a su ``etree.XPath``; ``failed``
+    guarda los que no se pudieron traducir (el extractor usa entonces
+    BeautifulSoup para esas páginas).
+    """
+
+    def __init__(self, selectors):
+        self.compiled = {}
+        self.failed = []
+        for group in selectors.values():
+            for selector in group:
+                if selector in self.compiled:
+                    continue
+                try:
+                    self.compiled[selector] = compile_selector(selector)
+                except (ValueError, etree.XPathError) as e:
+                    logger.debug(f"Selector not compilable to XPath: {selector} - {e}")
+                    self.failed.append(selector)
+
+    @property
+    def complete(self):
+        """Indica si todos los selectores se compilaron"""
+        return not self.failed
+
+    def first_match(self, tree, selectors, complete_only=False):
+        """(texto, selector) del primer elemento no vacío del primer selector que encuentre algo
+
+        Con ``complete_only`` (árboles a medio descargar) se ignoran los
+        elementos que el parser aún no ha cerrado.
+        """
+        for selector in selectors:
+            xpath = self.compiled.get(selector)
+            if xpath is None:
+                continue
+            for element in xpath(tree):
+                if complete_only and not is_complete(element):
+                    continue
+                text = element_text(element)
+                if text:
+                    return text, selector
+        return "", None
+
+    def first_text(self, tree, selectors, complete_only=False):
+        """Texto del primer elemento no vacío del primer selector que encuentre algo"""
+        return self.first_match(tree, selectors, complete_only)[0]
+
+
+def is_complete(element):
+    """Indica si el parser ya ha cerrado un elemento
+
+    En un árbol que se construye incrementalmente, un elemento está completo
+    cuando existe algún nodo posterior a él en orden de documento (un
+    hermano suyo o de alguno de sus ancestros).
+    """
+    node = element
+    while node is not None:
+        if node.getnext() is not None:
+            return True
+        node = node.getparent()
+    return False
+
+
+class IncrementalParser:
+    """Árbol lxml que se construye a medida que llegan los bloques de la respuesta
+
+    ``root`` está disponible desde el primer bloque y se puede consultar con
+    los XPath compilados mientras la descarga sigue en curso.
+    """
+
+    def __init__(self, encoding=None):
+        self.parser = etree.HTMLPullParser(events=('start',), tag='html', encoding=encoding,
+                                           remove_comments=True)
+        self.root = None
+
+    def feed(self, data):
+        """Añade un bloque de bytes al árbol"""
+        self.parser.feed(data)
+        for _, element in self.parser.read_events():
+            if self.root is None:
+                self.root = element
+
+
+def _synthetic_page(i):
+    """Página con el tamaño y la estructura de un perfil real"""
+    script = 'window.__STATE__ = {' + ','.join(f'"k{n}": "{"x" * 40}"' for n in range(800)) + '};'
+    nav = ''.join(f'<li class="nav-item"><a href="/section/{n}">Section {n}</a></li>' for n in range(120))
+    rows = ''.join(
+        f'<tr><td class="label">Field {n}</td><td class="value"><span>Value {n} of {i}</span></td></tr>'
+        for n in range(300)
+    )
+    footer = ''.join(f'<div class="footer-col"><p>Footer text {n}</p></div>' for n in range(80))
+    return (
+        f'<!DOCTYPE html><html><head><title>Company {i}</title><script>{script}</script>'
+        f'<style>.a{{color:red}}</style></head><body><header><nav><ul>{nav}</ul></nav></header>'
+        f'<main><div class="profile-header"><h1 class="profile-name">Company {i}</h1></div>'
+        f'<div class="company-link"><a href="https://company{i}.example/website">company{i}.example</a></div>'
+        f'<div class="description">Company {i} builds <b>things</b> for people.</div>'
+        f'<table>{rows}</table></main><footer>{footer}</footer></body></html>'
+    ).encode('utf-8')
+
+
+if __name__ == "__main__":
+    # Benchmark: BeautifulSoup + soupsieve frente a lxml + XPath compilado
+    import os
+    import sys
+    import time
+
+    from bs4 import BeautifulSoup
+
+    from config import ARCHIVE_CONFIG
+    from scraper import scraper
+
+    extractor = scraper.extractors['crunchbase']
+    pages = []
+
+    # Páginas guardadas en el archivo, si las hay (ruta opcional como argumento)
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else ARCHIVE_CONFIG['dir']
+    if os.path.exists(os.path.join(archive_dir, 'index.sqlite')):
+        from archive import PageArchive
+        archive = PageArchive(root=archive_dir)
+        for row in archive.iter_latest('crunchbase'):
+            pages.append((row[0], archive.read_blob(*row[3:])))
+            if len(pages) >= 200:
+                break
+        archive.close()
+
+    source = 'archive' if pages else 'synthetic'
+    if not pages:
+        pages = [(f"https://www.crunchbase.com/organization/company{i}", _synthetic_page(i))
+                 for i in range(200)]
+
+    fields = list(extractor.selectors)
+    compiled = CompiledSelectors(extractor.selectors)
+
+    def run_soup(content):
+        soup = BeautifulSoup(content, 'lxml')
+        return [extractor.extract_with_selectors(soup, extractor.selectors[f]) for f in fields]
+
+    def run_lxml(content):
+        tree = parse_html(content)
+        return [compiled.first_text(tree, extractor.selectors[f]) for f in fields]
+
+    def run_partial(content):
+        tree = parse_html(content, extractor.skip_tags, extractor.parse_regions)
+        return [compiled.first_text(tree, extractor.selectors[f]) for f in fields]
+
+    def retained(tree):
+        """Nodos y KB de texto que quedan en el árbol (aproximación a su memoria)"""
+        nodes = text = 0
+        for element in tree.iter():
+            nodes += 1
+            text += len(element.text or '') + len(element.tail or '')
+        return nodes, text / 1024
+
+    mismatches = sum(1 for _, content in pages if run_soup(content) != run_lxml(content))
+    partial_mismatches = sum(1 for _, content in pages if run_lxml(content) != run_partial(content))
+
+    timings = {}
+    for name, func in (('beautifulsoup', run_soup), ('lxml+xpath', run_lxml),
+                       ('lxml partial', run_partial)):
+        start = time.perf_counter()
+        for _, content in pages:
+            func(content)
+        timings[name] = (time.perf_counter() - start) / len(pages) * 1000
+
+    full_nodes, full_kb = retained(parse_html(pages[0][1]))
+    partial_nodes, partial_kb = retained(
+        parse_html(pages[0][1], extractor.skip_tags, extractor.parse_regions)
+    )
+
+    avg_kb = sum(len(content) for _, content in pages) / len(pages) / 1024
+    print(f"{len(pages)} {source} pages (avg {avg_kb:.0f} KB), translator: "
+          f"{'cssselect' if HTMLTranslator else 'built-in'}")
+    for name, ms in timings.items():
+        print(f"  {name:<14}: {ms:7.2f} ms/page")
+    print(f"  speedup       : {timings['beautifulsoup'] / timings['lxml+xpath']:.1f}x "
+          f"(partial: {timings['beautifulsoup'] / timings['lxml partial']:.1f}x)")
+    print(f"  mismatches    : {mismatches} (partial vs full: {partial_mismatches})")
+    print(f"  tree retained : full {full_nodes} nodes / {full_kb:.0f} KB text, "
+          f"partial {partial_nodes} nodes / {partial_kb:.0f} KB text")
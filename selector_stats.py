@@ -0,0 +1,178 @@
+"""
+Estadísticas de aciertos/fallos por selector y orden adaptativo de los selectores
+"""
+
+import os
+import json
+import tempfile
+import threading
+import logging
+
+from config import SELECTOR_STATS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def as_pair(value):
+    """[aciertos, fallos] de un contador (los ficheros antiguos solo guardaban aciertos)"""
+    if isinstance(value, int):
+        return [value, 0]
+    return [value[0], value[1]]
+
+
+def add_counts(target, delta):
+    """Suma un delta {source: {field: {selector: [hits, misses]}}} sobre ``target``"""
+    for source, fields in delta.items():
+        for field, selectors in fields.items():
+            counts = target.setdefault(source, {}).setdefault(field, {})
+            for selector, value in selectors.items():
+                hits, misses = as_pair(value)
+                current = as_pair(counts.get(selector, 0))
+                counts[selector] = [current[0] + hits, current[1] + misses]
+
+
+class SelectorStats:
+    """Cuántas veces cada selector se probó y dio el valor de un campo, por fuente
+
+    Los selectores se prueban en el orden declarado por el extractor (el
+    más preciso primero). Solo se relegan al final los que casi nunca
+    aciertan cuando se prueban (tasa de acierto por debajo de
+    ``demote_below`` tras ``min_attempts`` intentos): un selector genérico
+    nunca adelanta a otro más preciso que sigue encontrando el campo.
+
+    Los contadores se guardan en ``path`` (JSON) y se cargan al arrancar,
+    así que el orden aprendido sobrevive entre ejecuciones. Se llevan tres
+    vistas:
+
+    - ``counts``: totales conocidos (disco + esta ejecución), para ordenar
+    - ``unsaved``: aciertos aún no escritos a disco (``save`` los suma a lo
+      que haya en el fichero, por si otra ejecución lo actualizó)
+    - ``pending``: aciertos aún no entregados al proceso padre (los workers
+      de un ``ProcessPoolExecutor`` los devuelven con ``take_delta``). Un
+      worker creado con fork hereda el ``pending`` del padre; se descarta
+      comparando el pid para no contar dos veces
+    """
+
+    def __init__(self, path=None, min_attempts=None, demote_below=None):
+        self.path = path or SELECTOR_STATS_CONFIG['path']
+        self.min_attempts = min_attempts or SELECTOR_STATS_CONFIG['min_attempts']
+        self.demote_below = demote_below if demote_below is not None else SELECTOR_STATS_CONFIG['demote_below']
+        self.lock = threading.Lock()
+        self.counts = self.load()
+        self.unsaved = {}
+        self.pending = {}
+        self.pending_pid = os.getpid()
+
+    def load(self):
+        """Contadores guardados en disco ({} si no hay fichero o está corrupto)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, source, field, tried, selector):
+        """Anota un intento de ``field``: los ``tried`` anteriores a ``selector`` fallaron
+
+        ``tried`` es la lista de selectores en el orden en que se probaron y
+        ``selector`` el que dio el valor (None si ninguno: fallaron todos).
+        """
+        attempted = tried[:tried.index(selector)] if selector is not None else tried
+        delta = {source: {field: {missed: [0, 1] for missed in attempted}}}
+        if selector is not None:
+            delta[source][field][selector] = [1, 0]
+        with self.lock:
+            add_counts(self.counts, delta)
+            add_counts(self.unsaved, delta)
+            self.own_pending()
+            add_counts(self.pending, delta)
+
+    def ordered(self, source, field, selectors):
+        """Selectores de un campo en el orden declarado, con los que casi nunca aciertan al final"""
+        with self.lock:
+            counts = self.counts.get(source, {}).get(field)
+            if not counts:
+                return selectors
+            demoted = [selector for selector in selectors if self.is_dead(counts.get(selector, 0))]
+            if not demoted:
+                return selectors
+            return [selector for selector in selectors if selector not in demoted] + demoted
+
+    def is_dead(self, value):
+        """Indica si un selector falla casi siempre que se prueba"""
+        hits, misses = as_pair(value)
+        attempts = hits + misses
+        return attempts >= self.min_attempts and hits < attempts * self.demote_below
+
+    def take_delta(self):
+        """Devuelve y vacía los aciertos pendientes de entregar al proceso padre"""
+        with self.lock:
+            self.own_pending()
+            delta, self.pending = self.pending, {}
+        return delta
+
+    def own_pending(self):
+        """Vacía ``pending`` si se heredó de otro proceso (llamar con el lock)"""
+        pid = os.getpid()
+        if self.pending_pid != pid:
+            self.pending = {}
+            self.pending_pid = pid
+
+    def merge(self, delta):
+        """Incorpora los aciertos devueltos por un worker"""
+        if not delta:
+            return
+        with self.lock:
+            add_counts(self.counts, delta)
+            add_counts(self.unsaved, delta)
+
+    def save(self):
+        """Suma los aciertos nuevos a los del fichero y lo reescribe de forma atómica"""
+        with self.lock:
+            if not self.unsaved:
+                return
+            counts = self.load()
+            add_counts(counts, self.unsaved)
+
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(counts, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save selector stats: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+
+            self.counts = counts
+            self.unsaved = {}
+
+    def report(self, extractors):
+        """(aciertos, intentos) por fuente, campo y selector, en el orden declarado"""
+        with self.lock:
+            report = {}
+            for extractor in extractors:
+                source_counts = self.counts.get(extractor.source_name, {})
+                report[extractor.source_name] = {
+                    field: {
+                        selector: self.hits_and_attempts(source_counts.get(field, {}).get(selector, 0))
+                        for selector in selectors
+                    }
+                    for field, selectors in extractor.selectors.items()
+                }
+            return report
+
+    @staticmethod
+    def hits_and_attempts(value):
+        """(aciertos, intentos) de un contador"""
+        hits, misses = as_pair(value)
+        return hits, hits + misses
+
+
+# Instancia global (None si el orden adaptativo está desactivado)
+selector_stats = SelectorStats() if SELECTOR_STATS_CONFIG['enabled'] else None
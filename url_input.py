@@ -0,0 +1,197 @@
+"""
+Entrada de URLs para batch: lectura perezosa (.gz, stdin) y descarte de repetidas
+"""
+
+import os
+import io
+import sys
+import gzip
+import math
+import sqlite3
+import hashlib
+import tempfile
+import logging
+
+from config import INPUT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Inserciones en el conjunto en disco por transacción
+COMMIT_EVERY = 10000
+
+
+def open_input(source):
+    """Abre la fuente de URLs como texto: ruta, ruta ``.gz`` o ``-`` (stdin)"""
+    if source == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+    if source.endswith('.gz'):
+        return gzip.open(source, 'rt', encoding='utf-8', errors='replace')
+    return open(source, 'r', encoding='utf-8', errors='replace')
+
+
+def iter_urls(source):
+    """Genera las URLs de la fuente línea a línea (sin vacías ni comentarios ``#``)
+
+    Nada se carga en memoria: el primer request sale en cuanto se ha leído
+    la primera línea, sea cual sea el tamaño del fichero.
+    """
+    stream = open_input(source)
+    try:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if source != '-':
+            stream.close()
+
+
+class BloomFilter:
+    """Filtro de Bloom sobre un bytearray (tamaño fijo, sin falsos negativos)"""
+
+    def __init__(self, capacity, error_rate):
+        # Tamaño y número de hashes óptimos para ``capacity`` elementos
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        """Posiciones de bit de una clave (doble hashing sobre un blake2b de 128 bits)"""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Añade la clave; devuelve True si ya podía estar (todos los bits a 1)"""
+        present = True
+        for position in self.positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+    def contains(self, key):
+        """True si la clave podía estar (sin añadirla)"""
+        for position in self.positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                return False
+        return True
+
+
+class GrowingBloomFilter:
+    """Filtro de Bloom que crece con lo añadido (para entradas de tamaño desconocido)
+
+    Empieza con ``initial_capacity`` y, al llenarse, añade un filtro del doble
+    de capacidad con la mitad de error: la memoria es proporcional a las
+    claves vistas y el error total no pasa de ``error_rate``.
+    """
+
+    def __init__(self, initial_capacity, error_rate):
+        self.capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters = [BloomFilter(initial_capacity, error_rate / 2)]
+        self.filled = 0  # Claves en el último filtro
+
+    def add(self, key):
+        """Añade la clave; devuelve True si ya podía estar"""
+        if any(bloom.contains(key) for bloom in self.filters):
+            return True
+        if self.filled >= self.capacity:
+            self.capacity *= 2
+            self.filters.append(BloomFilter(self.capacity, self.error_rate / 2 ** (len(self.filters) + 1)))
+            self.filled = 0
+        self.filters[-1].add(key)
+        self.filled += 1
+        return False
+
+
+class URLDeduplicator:
+    """Conjunto de URLs vistas en una ejecución con memoria acotada
+
+    El filtro de Bloom responde en memoria para las URLs nuevas (la gran
+    mayoría); solo cuando dice "quizá vista" se confirma contra un conjunto
+    exacto en un sqlite temporal, de modo que un falso positivo nunca
+    descarta una URL que no se había visto.
+    """
+
+    def __init__(self, capacity=None, error_rate=None, directory=None):
+        self.bloom = BloomFilter(capacity or INPUT_CONFIG['bloom_capacity'],
+                                 error_rate or INPUT_CONFIG['bloom_error_rate'])
+        directory = directory or INPUT_CONFIG['dedupe_dir']
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.seen_', suffix='.sqlite')
+        os.close(fd)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=OFF')
+        self.db.execute('PRAGMA synchronous=OFF')
+        self.db.execute('CREATE TABLE seen (url TEXT PRIMARY KEY) WITHOUT ROWID')
+        self.pending = 0
+        self.duplicates = 0
+
+    def seen(self, url):
+        """Registra la URL y devuelve True si ya había salido antes en la ejecución"""
+        if self.bloom.add(url):
+            found = self.db.execute('SELECT 1 FROM seen WHERE url = ?', (url,)).fetchone()
+            if found:
+                self.duplicates += 1
+                return True
+
+        self.db.execute('INSERT OR IGNORE INTO seen (url) VALUES (?)', (url,))
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.db.commit()
+            self.pending = 0
+        return False
+
+    def filter(self, urls):
+        """Genera solo las URLs no vistas antes"""
+        for url in urls:
+            if not self.seen(url):
+                yield url
+
+    def close(self):
+        """Cierra y borra el conjunto en disco"""
+        self.db.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # Benchmark: lectura perezosa + deduplicación de un seed .gz con repetidas
+    import time
+
+    lines = 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'seed.txt.gz')
+        with gzip.open(path, 'wt') as f:
+            for i in range(lines):
+                # Una de cada cinco líneas repite una URL anterior
+                n = i - 1 if i % 5 == 4 else i
+                f.write(f"https://www.crunchbase.com/organization/company-{n}\n")
+
+        start = time.perf_counter()
+        with URLDeduplicator(capacity=lines, directory=directory) as dedupe:
+            urls = dedupe.filter(iter_urls(path))
+            next(urls)
+            first_after = time.perf_counter() - start
+            unique = 1 + sum(1 for _ in urls)
+            duplicates = dedupe.duplicates
+            bloom_bytes = len(dedupe.bloom.bits)
+        elapsed = time.perf_counter() - start
+
+    print(f"{lines} lines (gzip)")
+    print(f"  first URL after : {first_after * 1000:.1f} ms")
+    print(f"  unique / dups   : {unique} / {duplicates}")
+    print(f"  total           : {elapsed:.1f} s ({elapsed / lines * 1e6:.1f} us/line)")
+    print(f"  bloom filter    : {bloom_bytes / 1024 / 1024:.1f} MB in memory, exact set on disk")